@@ -1,15 +1,24 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-from pymongo import MongoClient
 from datetime import datetime, timedelta
-from config import MONGO_URL # Assuming config.py is in the same directory
 
 class AFK(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.client = MongoClient(MONGO_URL)
-        self.db = self.client.hxhbot.users # Using the 'users' collection for AFK data
+        self.db = bot.db # Shared async user repository (the 'users' collection holds AFK data)
+        # In-memory index of AFK users: user_id -> {"reason": ..., "time": ...}
+        # Only a handful of users are AFK at once, so on_message can answer from this dict without any DB I/O.
+        self.afk_users = {}
+
+    async def cog_load(self):
+        # Seed the AFK index from the database once at startup
+        try:
+            docs = await self.db.find_users({"afk": {"$exists": True}}, projection={"afk": 1})
+            self.afk_users = {doc["_id"]: doc["afk"] for doc in docs}
+            print(f"Loaded {len(self.afk_users)} AFK users.")
+        except Exception as e:
+            print(f"Error loading AFK users: {e}")
 
     # --- Slash Command: /afk ---
     @app_commands.command(name="afk", description="Set yourself as AFK with an optional reason.")
@@ -19,11 +28,9 @@ class AFK(commands.Cog):
         current_time = datetime.utcnow()
 
         # Update or insert user's AFK status
-        self.db.update_one(
-            {"_id": user_id},
-            {"$set": {"afk": {"reason": reason, "time": current_time}}},
-            upsert=True
-        )
+        afk_data = {"reason": reason, "time": current_time}
+        await self.db.set_fields(user_id, {"afk": afk_data})
+        self.afk_users[user_id] = afk_data
 
         afk_message = f"You are now AFK"
         if reason:
@@ -55,12 +62,12 @@ class AFK(commands.Cog):
             return
 
         user_id = str(message.author.id)
-        user_data = self.db.find_one({"_id": user_id})
 
         # --- Check if the author of the message is AFK (to clear their status) ---
-        if user_data and "afk" in user_data:
+        user_afk = self.afk_users.pop(user_id, None)
+        if user_afk:
             # Clear AFK status
-            self.db.update_one({"_id": user_id}, {"$unset": {"afk": ""}})
+            await self.db.unset_fields(user_id, "afk")
             
             # Remove [AFK] from nickname if present
             try:
@@ -79,7 +86,7 @@ class AFK(commands.Cog):
                 print(f"An error occurred while clearing AFK nickname: {e}")
 
             # Calculate AFK duration
-            afk_time = user_data["afk"]["time"]
+            afk_time = user_afk["time"]
             duration = datetime.utcnow() - afk_time
             
             # Format duration nicely
@@ -104,12 +111,11 @@ class AFK(commands.Cog):
 
         # --- Check for mentions of AFK users ---
         for member in message.mentions:
-            member_id = str(member.id)
-            afk_data = self.db.find_one({"_id": member_id})
+            afk_data = self.afk_users.get(str(member.id))
 
-            if afk_data and "afk" in afk_data:
-                reason = afk_data["afk"]["reason"]
-                afk_time = afk_data["afk"]["time"]
+            if afk_data:
+                reason = afk_data["reason"]
+                afk_time = afk_data["time"]
                 
                 # Calculate AFK duration
                 duration = datetime.utcnow() - afk_time
@@ -140,9 +146,5 @@ class AFK(commands.Cog):
                 # Only send one AFK response per message, even if multiple AFK users are mentioned
                 return 
 
-    def cog_unload(self):
-        self.client.close()
-        print("AFK MongoDB client closed.")
-
 async def setup(bot):
     await bot.add_cog(AFK(bot))
\ No newline at end of file
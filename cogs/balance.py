@@ -1,13 +1,11 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-from pymongo import MongoClient
-from config import MONGO_URL
 
 class Balance(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.db = MongoClient(MONGO_URL).hxhbot.users
+        self.db = bot.db
 
     @commands.command(name='balance')
     async def balance_text(self, ctx):
@@ -18,7 +16,7 @@ class Balance(commands.Cog):
         await self.show_balance(interaction.user, interaction)
 
     async def show_balance(self, user, ctx_or_interaction):
-        user_data = self.db.find_one({'_id': str(user.id)})
+        user_data = await self.db.get_user(user.id)
         balance = user_data['balance'] if user_data and 'balance' in user_data else 0
         emoji = "<:1916pepecoin:1376564847088504872>"
         message = f"Your current balance is ₱{balance} {emoji}"
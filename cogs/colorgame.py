@@ -2,9 +2,8 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 import random
-import asyncio
-from pymongo import MongoClient
-from config import MONGO_URL # Assuming config.py is in the same directory
+from utils import outcomes
+from utils.locks import exclusive
 
 # Define your custom animated color emojis
 GREEN_EMOJI = "<a:greeng:1376794387521998932>"
@@ -18,14 +17,13 @@ COLORS = {
     "pink": PINK_EMOJI,
 }
 
-# The colors that will be 'rolled' by the dice
-ROLLABLE_COLORS = list(COLORS.keys())
+# The colors that are 'rolled' by the dice come from utils/outcomes.py
+COLOR_EMOJIS = tuple(COLORS.values()) # For the rolling animation
 
 class ColorGame(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.client = MongoClient(MONGO_URL)
-        self.db = self.client.hxhbot.users # Connect to the same 'users' collection
+        self.db = bot.db # Shared async repository for the 'users' collection
 
     @app_commands.command(name="colorgame", description="Bet on colors in a perya-style game!")
     @app_commands.describe(
@@ -51,6 +49,7 @@ class ColorGame(commands.Cog):
             app_commands.Choice(name="Pink", value="pink"),
         ],
     )
+    @exclusive # One economy command per user at a time
     async def colorgame(self, interaction: discord.Interaction, bet_amount: int, color1: str, color2: str = None, color3: str = None):
         user_id = str(interaction.user.id)
         chosen_colors = [color1]
@@ -65,67 +64,60 @@ class ColorGame(commands.Cog):
         # Defer the response immediately
         await interaction.response.defer(ephemeral=False)
 
-        user_data = self.db.find_one({"_id": user_id})
-        current_balance = int(user_data.get("balance", 0)) if user_data else 0
-
         total_bet_cost = bet_amount * len(chosen_colors)
 
         # --- Input Validation ---
         if bet_amount <= 0:
             return await interaction.followup.send("❌ You must bet a positive amount.", ephemeral=True)
-        
-        if total_bet_cost > current_balance:
-            return await interaction.followup.send(
-                f"❌ You don't have enough money! Your total bet is ₱{total_bet_cost:,} but you only have ₱{current_balance:,}.",
-                ephemeral=True
-            )
-
-        # Display chosen colors
-        chosen_color_emojis = [COLORS[c] for c in chosen_colors]
-        await interaction.followup.send(
-            f"{interaction.user.mention} is betting ₱{bet_amount:,} on {', '.join(chosen_color_emojis)}!\n"
-            f"Total bet: ₱{total_bet_cost:,}. Rolling the colors! {random.choice(list(COLORS.values()))} {random.choice(list(COLORS.values()))} {random.choice(list(COLORS.values()))}"
-        )
-
-        # --- Rolling Animation ---
-        roll_message = await interaction.channel.send("Rolling... 🎲")
-        
-        for _ in range(5): # Roll 5 times for animation effect
-            rolled_emojis = [random.choice(list(COLORS.values())) for _ in range(3)]
-            await roll_message.edit(content=f"Rolling... {rolled_emojis[0]} {rolled_emojis[1]} {rolled_emojis[2]}")
-            await asyncio.sleep(0.7) # Adjust speed of roll animation
 
-        # --- Determine Outcome ---
-        final_roll_colors = [random.choice(ROLLABLE_COLORS) for _ in range(3)]
+        # --- Determine Outcome, before anything is shown ---
+        final_roll_colors = outcomes.roll_colors()
         final_roll_emojis = [COLORS[c] for c in final_roll_colors]
 
-        winnings = 0
-        losses = 0
-        
         # Track which chosen colors appeared and how many times
+        matches = outcomes.color_matches(chosen_colors, final_roll_colors)
+        winnings = outcomes.color_winnings(matches, bet_amount) # Win 1x, 2x, or 3x the bet for each color
         results_summary = {} 
 
-        # Calculate winnings/losses for each chosen color
-        for chosen_color in chosen_colors:
-            count = final_roll_colors.count(chosen_color)
+        # Describe the win/loss for each chosen color
+        for chosen_color, count in matches.items():
             if count > 0:
-                winnings += bet_amount * count # Win 1x, 2x, or 3x the bet for that color
                 results_summary[chosen_color] = f"Won ₱{bet_amount * count:,} ({count}x)"
             else:
-                losses += bet_amount # Lose the bet for that specific color
                 results_summary[chosen_color] = "Lost ₱" + str(bet_amount)
 
         # Calculate total win/loss
         net_change = winnings - total_bet_cost
-        new_balance = current_balance + net_change
 
-        # --- Update Balance ---
-        self.db.update_one(
-            {"_id": user_id},
-            {"$inc": {"balance": net_change}},
-            upsert=True
+        # Settle the round in a single atomic update: take the total bet (if affordable)
+        # and pay out any winnings in the same write
+        user_data = await self.db.debit(user_id, total_bet_cost, inc={"balance": winnings}, reason="colorgame")
+        if user_data is None:
+            user_data = await self.db.get_user(user_id)
+            current_balance = int(user_data.get("balance", 0)) if user_data else 0
+            return await interaction.followup.send(
+                f"❌ You don't have enough money! Your total bet is ₱{total_bet_cost:,} but you only have ₱{current_balance:,}.",
+                ephemeral=True
+            )
+        new_balance = int(user_data["balance"]) # Balance after the round was settled
+
+        # Display chosen colors
+        chosen_color_emojis = [COLORS[c] for c in chosen_colors]
+        await interaction.followup.send(
+            f"{interaction.user.mention} is betting ₱{bet_amount:,} on {', '.join(chosen_color_emojis)}!\n"
+            f"Total bet: ₱{total_bet_cost:,}. Rolling the colors! {' '.join(random.choices(COLOR_EMOJIS, k=3))}"
         )
 
+        # --- Rolling Animation ---
+        roll_message = await interaction.channel.send("Rolling... 🎲")
+        
+        # Roll 5 times for animation effect, 0.7 seconds apart (adjust speed of roll animation here).
+        # Queued through the shared edit scheduler: frames that fall behind the rate limit are dropped
+        frames = []
+        for step in range(5):
+            content = "Rolling... " + " ".join(random.choices(COLOR_EMOJIS, k=3))
+            frames.append((step * 0.7, lambda content=content: self.bot.edits.edit(roll_message, content=content)))
+
         # --- Send Final Result ---
         result_embed = discord.Embed(
             title="🎲 Color Game Results! 🎲",
@@ -149,14 +141,12 @@ class ColorGame(commands.Cog):
 
         result_embed.set_footer(text=f"Your new balance: ₱{new_balance:,}.")
 
-        await roll_message.delete() # Delete the rolling message
-        await interaction.followup.send(embed=result_embed)
-
+        async def reveal_result():
+            await self.bot.edits.delete(roll_message) # Delete the rolling message (and any pending frames)
+            await interaction.followup.send(embed=result_embed)
 
-    def cog_unload(self):
-        # Good practice: Close the MongoDB client when the cog is unloaded
-        self.client.close()
-        print("ColorGame MongoDB client closed.")
+        # Play the roll and reveal the result (scheduled, nothing sleeps here)
+        self.bot.reveals.schedule(user_id, 3.5, reveal_result, frames)
 
 async def setup(bot):
     await bot.add_cog(ColorGame(bot))
\ No newline at end of file
@@ -1,51 +1,49 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-from datetime import datetime, timedelta
-from pymongo import MongoClient
-from config import MONGO_URL
+from utils.cooldowns import DAILY_SECONDS
+from utils.locks import exclusive
 
 class Daily(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.db = MongoClient(MONGO_URL).hxhbot.users  # Make sure this points to your 'users' collection
+        self.db = bot.db  # Shared async repository for the 'users' collection
+        self.cooldowns = bot.cooldowns # Shared in-memory cooldowns (utils/cooldowns.py)
 
     @commands.command(name='daily')
+    @exclusive # One economy command per user at a time
     async def daily_text(self, ctx):
         await self.handle_daily(ctx.author, ctx)
 
     @app_commands.command(name='daily', description='Claim your daily reward (₱500 every 24h)')
+    @exclusive
     async def daily_slash(self, interaction: discord.Interaction):
         await self.handle_daily(interaction.user, interaction)
 
     async def handle_daily(self, user, ctx_or_interaction):
-        now = datetime.utcnow()
-        user_data = self.db.find_one({'_id': str(user.id)})
-
         amount = 500
         emoji = "<:1916pepecoin:1376564847088504872>"
 
-        if user_data and 'last_claim' in user_data:
-            last_claim = user_data['last_claim']
-            next_claim_time = last_claim + timedelta(days=1)
-            if now < next_claim_time:
-                remaining = next_claim_time - now
-                hours, remainder = divmod(int(remaining.total_seconds()), 3600)
-                minutes = remainder // 60
-                message = f"❌ You've already claimed your daily. Try again in {hours}h {minutes}m."
-                return await self.send_response(ctx_or_interaction, message)
-
-        new_balance = (user_data['balance'] if user_data else 0) + amount
-
-        self.db.update_one(
-            {'_id': str(user.id)},
-            {'$set': {'last_claim': now, 'balance': new_balance}},
-            upsert=True
-        )
+        # Claim atomically: the 24h cooldown is only armed if the last one has run out,
+        # so two quick invocations can't both pay out, and $inc doesn't clobber concurrent balance changes.
+        remaining = await self.cooldowns.claim(user.id, "daily", DAILY_SECONDS)
+        if remaining:
+            return await self.send_response(ctx_or_interaction, self.cooldown_message(remaining))
+        try:
+            await self.db.credit(user.id, amount, reason="daily")
+        except Exception:
+            self.cooldowns.disarm(user.id, "daily") # Not paid, so they can claim again
+            raise
 
         message = f"You received **__₱ {amount} {emoji}__**\n You Beggar Daily Reward Claimed!"
         await self.send_response(ctx_or_interaction, message)
 
+    def cooldown_message(self, remaining):
+        """Returns the "already claimed" message for `remaining` seconds of cooldown."""
+        hours, remainder = divmod(int(remaining), 3600)
+        minutes = remainder // 60
+        return f"❌ You've already claimed your daily. Try again in {hours}h {minutes}m."
+
     async def send_response(self, ctx_or_interaction, message):
         if isinstance(ctx_or_interaction, commands.Context):
             await ctx_or_interaction.send(message)
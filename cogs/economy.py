@@ -0,0 +1,55 @@
+import discord
+from discord.ext import commands
+from discord import app_commands
+
+RECENT_MINUTES = 10 # Per-minute rows shown at the bottom of /economy
+
+class Economy(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self.events = bot.db.events # Economy event log with rolling per-minute stats
+
+    @app_commands.command(name="economy", description="(Admin) How much ₱ was minted and burned recently.")
+    @app_commands.describe(minutes="How many minutes back to look (default: the whole tracked window)")
+    @app_commands.default_permissions(administrator=True)
+    @app_commands.guild_only()
+    async def economy(self, interaction: discord.Interaction, minutes: app_commands.Range[int, 1, None] = None):
+        if not interaction.permissions.administrator:
+            return await interaction.response.send_message("❌ Only administrators can use this command.", ephemeral=True)
+        if self.events is None:
+            return await interaction.response.send_message("❌ The economy event log is turned off.", ephemeral=True)
+
+        # Everything below is answered from the in-memory aggregates, no database queries
+        minutes = min(minutes or self.events.window, self.events.window)
+        summary = self.events.summary(minutes)
+
+        embed = discord.Embed(
+            title=f"📈 Economy — last {minutes} minute(s)",
+            color=discord.Color.green() if summary["minted"] >= summary["burned"] else discord.Color.red()
+        )
+        embed.add_field(name="Minted", value=f"₱{summary['minted']:,}", inline=True)
+        embed.add_field(name="Burned", value=f"₱{summary['burned']:,}", inline=True)
+        embed.add_field(name="Net", value=f"₱{summary['minted'] - summary['burned']:+,}", inline=True)
+
+        # Busiest kinds first: games, salaries, the shop, and transfers like /rob
+        kinds = sorted(summary["kinds"].items(), key=lambda item: item[1]["volume"], reverse=True)
+        lines = [
+            f"**{kind}** — {totals['events']:,} event(s), volume ₱{totals['volume']:,}, net ₱{totals['net']:+,}"
+            for kind, totals in kinds
+        ]
+        embed.add_field(name="By kind", value="\n".join(lines) or "No activity yet.", inline=False)
+
+        recent = self.events.per_minute(min(minutes, RECENT_MINUTES))
+        if recent:
+            rows = "\n".join(
+                f"<t:{minute * 60}:t> +₱{minted:,} / -₱{burned:,}" for minute, minted, burned in reversed(recent)
+            )
+            embed.add_field(name="Per minute (minted / burned)", value=rows, inline=False)
+
+        if self.events.dropped:
+            embed.set_footer(text=f"{self.events.dropped:,} event(s) were dropped while the database was unreachable.")
+
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+async def setup(bot):
+    await bot.add_cog(Economy(bot))
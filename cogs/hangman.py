@@ -3,9 +3,9 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import aiohttp
 import asyncio
-import random
+from config import HANGMAN_WORD_API
+from utils.words import WordBank
 
 # Hangman stages (ASCII art) - expanded for more attempts
 HANGMAN_STAGES = [
@@ -25,30 +25,133 @@ HANGMAN_STAGES = [
 # Max attempts allowed. Must be `len(HANGMAN_STAGES) - 1` because index 0 is the initial state.
 MAX_ATTEMPTS = len(HANGMAN_STAGES) - 1 # This will be 10 if you use all 11 stages (0-10)
 
+ALPHABET = "abcdefghijklmnopqrstuvwxyz"
+
+
+def letter_bit(letter: str) -> int:
+    """Bit for `letter` in a 26-bit guessed-letters mask (a = bit 0)."""
+    return 1 << (ord(letter) - 97)
+
+
+def mask_letters(mask: int) -> str:
+    """The letters set in `mask`, in alphabetical order."""
+    return "".join(letter for i, letter in enumerate(ALPHABET) if mask >> i & 1)
+
+
 # Represents a single instance of a Hangman game
 class HangmanGame:
-    def __init__(self, bot, channel: discord.TextChannel, word: str, players: list[discord.Member] | None):
-        self.bot = bot # Need bot instance to use wait_for
+    # Many games can run at once in big servers, so keep instances small
+    __slots__ = (
+        "bot", "channel", "word", "positions", "display", "hidden", "guessed_mask", "attempts_left",
+        "players", "current_turn_index", "message", "is_stopped", "guesses", "accepting_guesses",
+        "current_player", "store", "_board",
+    )
+
+    def __init__(self, bot, channel: discord.TextChannel, word: str, players: list[discord.Member] | None, store=None):
+        self.bot = bot
         self.channel = channel # The channel where the game is being played
         self.word = word
-        self.display = ["_" for _ in word] # The masked word shown to players
-        self.guessed_letters = set() # Set to store all guessed letters
+        self.positions = {} # letter -> indexes in the word, so a correct guess reveals in O(k)
+        for i, c in enumerate(word):
+            self.positions.setdefault(c, []).append(i)
+        self.display = ["_"] * len(word) # The masked word shown to players
+        self.hidden = len(word) # How many letters are still "_"
+        self.guessed_mask = 0 # Bit per guessed letter, see letter_bit()
         self.attempts_left = MAX_ATTEMPTS # Remaining attempts
         self.players = players # List of players (solo/duo) or None (ffa)
         self.current_turn_index = 0 # To track whose turn it is in solo/duo
         self.message = None # To store the main game message, allowing edits
         self.is_stopped = False # Flag to indicate if the game has been stopped externally
+        self.guesses = asyncio.Queue() # Guess messages routed here by Hangman.on_message (None = stop)
+        self.accepting_guesses = False # Only True while the loop is waiting for a guess
+        self.current_player = None # Whose turn it is in solo/duo, None in FFA
+        self.store = store # hangman_games collection for restart snapshots (None = not persisted)
+        self._board = None # Cached get_game_state_message(), cleared whenever the state changes
+
+    # Snapshot format, one small document per channel:
+    #   {_id: channel id, m: message id, w: word, g: guessed letters mask,
+    #    a: attempts left, t: turn index, p: player ids or None for FFA}
+    # The masked word isn't stored, it's rebuilt from w and g.
+    def snapshot(self) -> dict:
+        return {
+            "_id": self.channel.id,
+            "m": self.message.id,
+            "w": self.word,
+            "g": self.guessed_mask,
+            "a": self.attempts_left,
+            "t": self.current_turn_index,
+            "p": [p.id for p in self.players] if self.players is not None else None,
+        }
+
+    @classmethod
+    def from_snapshot(cls, bot, channel, message: discord.Message, doc: dict, players, store=None):
+        """Rebuilds a game saved by `snapshot()` so it can resume where it left off."""
+        game = cls(bot, channel, doc["w"], players, store=store)
+        game.message = message
+        mask = doc["g"]
+        if isinstance(mask, str): # Snapshots from before the mask stored the letters themselves
+            mask = sum(letter_bit(letter) for letter in mask)
+        for letter, positions in game.positions.items():
+            if mask & letter_bit(letter):
+                game.reveal(positions)
+        game.guessed_mask = mask
+        game.attempts_left = doc["a"]
+        game.current_turn_index = doc["t"]
+        return game
+
+    async def save(self):
+        """Writes the full snapshot, once when the game message is first sent."""
+        if self.store is None:
+            return
+        try:
+            await self.store.replace_one({"_id": self.channel.id}, self.snapshot(), upsert=True)
+        except Exception as e:
+            print(f"Error saving Hangman snapshot: {e}")
+
+    async def checkpoint(self):
+        """Saves only the fields a guess can change."""
+        if self.store is None:
+            return
+        try:
+            await self.store.update_one({"_id": self.channel.id}, {"$set": {
+                "g": self.guessed_mask,
+                "a": self.attempts_left,
+                "t": self.current_turn_index,
+            }})
+        except Exception as e:
+            print(f"Error checkpointing Hangman game: {e}")
+
+    def offer(self, message: discord.Message):
+        """Called by the cog's on_message router for every message in this game's channel."""
+        if not self.accepting_guesses:
+            return
+        content = message.content.strip().lower()
+        if content == "/hangman" or content == "/hangman stop": # Ignore new game and stop commands
+            return
+        if self.players is not None and message.author != self.current_player: # If turn-based, only current player
+            return
+        self.accepting_guesses = False # Take one guess per wait, like wait_for did
+        self.guesses.put_nowait(message)
 
     def format_display(self):
         """Returns the current state of the word, e.g., "_ y t _ _ n" """
         return " ".join(self.display)
 
+    def format_guessed(self):
+        return ", ".join(mask_letters(self.guessed_mask)) or "None"
+
+    def reveal(self, positions):
+        for i in positions:
+            self.display[i] = self.word[i]
+        self.hidden -= len(positions)
+        self._board = None
+
     async def start(self):
         """Sends the initial game message and starts the game loop."""
         initial_message_content = (
             f"🎯 **Hangman Game Started!**\n"
             f"Word: `{self.format_display()}`\n"
-            f"Guessed Letters: `{', '.join(sorted(list(self.guessed_letters))) or 'None'}`\n"
+            f"Guessed Letters: `{self.format_guessed()}`\n"
             f"You have {self.attempts_left} tries.\n"
             f"{HANGMAN_STAGES[0]}" # Initial gallows state
         )
@@ -57,38 +160,38 @@ class HangmanGame:
             
         # Send the first message, which will be edited throughout the game
         self.message = await self.channel.send(initial_message_content)
+        await self.save()
+        await self.game_loop()
+
+    async def resume(self):
+        """Continues a game restored from a snapshot (its message already exists)."""
         await self.game_loop()
 
     async def game_loop(self):
         """Main loop for the Hangman game, handling turns and guesses."""
-        while self.attempts_left > 0 and "_" in self.display and not self.is_stopped:
+        while self.attempts_left > 0 and self.hidden and not self.is_stopped:
             current_player_obj = None
             if self.players: # Solo or Duo mode
                 current_player_obj = self.players[self.current_turn_index % len(self.players)]
-                await self.message.edit(content=self.get_game_state_message() + f"\n\n🔁 {current_player_obj.mention}, it's your turn to guess a letter or the full word.")
+                self.bot.edits.edit(self.message, content=self.get_game_state_message() + f"\n\n🔁 {current_player_obj.mention}, it's your turn to guess a letter or the full word.")
                 
             else: # FFA mode
-                await self.message.edit(content=self.get_game_state_message() + "\n\nGuess a letter or the full word!")
+                self.bot.edits.edit(self.message, content=self.get_game_state_message() + "\n\nGuess a letter or the full word!")
 
             try:
-                # Wait for a message in the channel
-                guess_msg = await self.bot.wait_for(
-                    "message",
-                    timeout=60, # 60 seconds to guess
-                    check=lambda m: (
-                        m.channel == self.channel and # Must be in the game channel
-                        m.content.strip().lower() != "/hangman" and # Ignore new game commands
-                        m.content.strip().lower() != "/hangman stop" and # Ignore stop commands
-                        (self.players is None or m.author == current_player_obj) # If turn-based, only current player
-                    )
-                )
+                # Wait for a guess: the cog's on_message routes this channel's messages into our queue
+                self.current_player = current_player_obj
+                self.accepting_guesses = True
+                guess_msg = await asyncio.wait_for(self.guesses.get(), timeout=60) # 60 seconds to guess
             except asyncio.TimeoutError:
                 if not self.is_stopped: # Only send timeout if not stopped by command
-                    await self.message.edit(content=f"⏰ Time's up! Game over. The word was: `{self.word}`", view=None)
+                    self.bot.edits.edit(self.message, content=f"⏰ Time's up! Game over. The word was: `{self.word}`", view=None)
                 break # Exit game loop
+            finally:
+                self.accepting_guesses = False
             
             # If the game was stopped while waiting for input, break out
-            if self.is_stopped:
+            if guess_msg is None or self.is_stopped:
                 break
 
             # Delete the user's guess message to keep the channel clean
@@ -99,20 +202,21 @@ class HangmanGame:
 
             guess = guess_msg.content.lower().strip()
 
-            if not guess.isalpha():
+            if not (guess.isascii() and guess.isalpha()):
                 await self.channel.send("❌ Your guess must be alphabetic (a letter or a word)!", delete_after=5)
                 continue
 
             if len(guess) == 1: # Single letter guess
-                if guess in self.guessed_letters:
+                bit = letter_bit(guess)
+                if self.guessed_mask & bit:
                     await self.channel.send(f"⚠️ You already guessed `{guess}`!", delete_after=5)
                     continue
 
-                self.guessed_letters.add(guess)
-                if guess in self.word:
-                    for i, c in enumerate(self.word):
-                        if c == guess:
-                            self.display[i] = guess
+                self.guessed_mask |= bit
+                self._board = None
+                positions = self.positions.get(guess)
+                if positions:
+                    self.reveal(positions)
                     await self.channel.send(f"✅ Correct! `{guess}` was in the word.", delete_after=5)
                 else:
                     self.attempts_left -= 1
@@ -120,53 +224,60 @@ class HangmanGame:
             else: # Full word guess
                 if guess == self.word:
                     self.display = list(self.word) # Reveal the full word
+                    self.hidden = 0
+                    self._board = None
                     await self.channel.send(f"🎉 **{guess_msg.author.mention} Solved it!** The word was: `{self.word}`")
                     break # Game won
                 else:
                     self.attempts_left -= 1
+                    self._board = None
                     await self.channel.send(f"❌ Wrong word! `{guess}` was not the word.", delete_after=5)
             
             # Advance turn for next player in solo/duo
             if self.players:
                 self.current_turn_index += 1
+
+            await self.checkpoint() # So the game survives a restart from this point
             
             # Update the main game message after each guess
+            # (through the shared edit scheduler, so it merges with the next turn prompt)
             if not self.is_stopped: # Only update if not stopped externally
-                await self.message.edit(content=self.get_game_state_message())
+                self.bot.edits.edit(self.message, content=self.get_game_state_message())
 
         # Game ended (win, lose, or stopped)
         if self.is_stopped:
             final_message_content = f"🛑 The Hangman game was stopped by command. The word was: `{self.word}`"
-        elif "_" not in self.display:
+        elif not self.hidden:
             final_message_content = f"🎉 **GAME WON!** The word was: `{self.word}`"
         else:
             final_message_content = f"💀 **GAME OVER!** You ran out of tries. The word was: `{self.word}`"
         
-        await self.message.edit(content=final_message_content, view=None) # Ensure buttons are gone
+        # Final result jumps ahead of any pending board updates in this channel
+        await self.bot.edits.edit(self.message, content=final_message_content, view=None, final=True) # Ensure buttons are gone
 
     def get_game_state_message(self):
-        """Constructs the current state message of the game."""
+        """Constructs the current state message of the game (cached until the next guess changes it)."""
+        if self._board is not None:
+            return self._board
         current_stage_art = HANGMAN_STAGES[MAX_ATTEMPTS - self.attempts_left]
         
         content = (
             f"🎯 **Hangman Game Started!**\n"
             f"Word: `{self.format_display()}`\n"
-            f"Guessed Letters: `{', '.join(sorted(list(self.guessed_letters))) or 'None'}`\n"
+            f"Guessed Letters: `{self.format_guessed()}`\n"
             f"Tries left: {self.attempts_left}\n"
             f"{current_stage_art}"
         )
         if self.players:
             content += f"\n\n**Players:** {', '.join([p.mention for p in self.players])}"
+        self._board = content
         return content
 
     async def stop_game(self, stopper: discord.Member):
         """Forcefully stops the game."""
         self.is_stopped = True
-        # Wake up the wait_for loop if it's currently waiting
-        if self.bot and hasattr(self.bot, '_connection') and self.message:
-            # Send a dummy message to trigger the check and let the loop break
-            # This is a bit of a hack, but ensures the wait_for finishes quickly
-            await self.channel.send(f"Game is stopping...", delete_after=0.1)
+        # Wake up the game loop if it's currently waiting for a guess
+        self.guesses.put_nowait(None)
 
 
 class Hangman(commands.Cog):
@@ -174,23 +285,93 @@ class Hangman(commands.Cog):
         self.bot = bot
         # Dictionary to store active games by channel ID
         self.active_games = {} 
+        self.session = bot.http_session # Shared, pooled aiohttp session
+        self.words = WordBank() # Bundled word list, loaded once
+        self.snapshots = bot.db.database.hangman_games # Running games, restored after a restart
+        self.restore_task = None
+        self.running = set() # Restored game tasks, kept referenced until they finish
+
+    async def cog_load(self):
+        # Fetching channels/messages needs the gateway, so wait for it in the background
+        self.restore_task = asyncio.create_task(self.restore_games())
+
+    async def cog_unload(self):
+        if self.restore_task:
+            self.restore_task.cancel()
+
+    async def run_game(self, channel_id: int, game_coro):
+        """Runs a game to completion, then forgets it (in memory and in Mongo)."""
+        # Cancellation (e.g. shutdown) skips the cleanup, so the snapshot survives the restart
+        await game_coro
+        self.active_games.pop(channel_id, None)
+        try:
+            await self.snapshots.delete_one({"_id": channel_id})
+        except Exception as e:
+            print(f"Error deleting Hangman snapshot: {e}")
+        print(f"Hangman game in channel {channel_id} ended and cleaned up.")
+
+    async def restore_games(self):
+        """Resumes every game that was running when the bot last stopped."""
+        await self.bot.wait_until_ready()
+        try:
+            docs = await self.snapshots.find().to_list(length=None)
+        except Exception as e:
+            print(f"Error loading Hangman snapshots: {e}")
+            return
 
-    # Helper function to fetch a random word from an online API
-    async def fetch_word(self) -> str:
-        async with aiohttp.ClientSession() as session:
+        restored = 0
+        for doc in docs:
+            channel_id = doc["_id"]
+            if channel_id in self.active_games:
+                continue
             try:
-                # Request a word of length 5 to 9 for better gameplay experience
-                async with session.get("https://random-word-api.herokuapp.com/word?length=5&min=5&max=9") as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        word = data[0].lower()
-                        # Basic validation to ensure the word contains only alphabetic characters
-                        if word.isalpha():
-                            return word
-            except aiohttp.ClientError as e:
-                print(f"Error fetching word from API: {e}")
-            # Fallback to a hardcoded list if API fails or returns an invalid word
-            return random.choice(["python", "discord", "hangman", "bot", "code", "challenge", "gemini", "developer", "program"])
+                channel = self.bot.get_channel(channel_id) or await self.bot.fetch_channel(channel_id)
+                message = await channel.fetch_message(doc["m"])
+                players = None
+                if doc["p"] is not None:
+                    players = [await self.resolve_player(channel, user_id) for user_id in doc["p"]]
+                game = HangmanGame.from_snapshot(self.bot, channel, message, doc, players, store=self.snapshots)
+            except Exception as e:
+                # Channel, message or a player is gone (or the snapshot is unreadable): the game can't continue
+                print(f"Dropping Hangman game in channel {channel_id}: {e}")
+                try:
+                    await self.snapshots.delete_one({"_id": channel_id})
+                except Exception as e:
+                    print(f"Error deleting Hangman snapshot: {e}")
+                continue
+            restored += 1
+
+            self.active_games[channel_id] = game
+            task = asyncio.create_task(self.run_game(channel_id, game.resume()))
+            self.running.add(task)
+            task.add_done_callback(self.running.discard)
+        if restored:
+            print(f"Restored {restored} Hangman game(s).")
+
+    async def resolve_player(self, channel, user_id: int):
+        # DM channels have no guild, so their players are looked up as plain users
+        guild = getattr(channel, "guild", None)
+        if guild is None:
+            return self.bot.get_user(user_id) or await self.bot.fetch_user(user_id)
+        return guild.get_member(user_id) or await guild.fetch_member(user_id)
+
+    # Single router for every running game: one dict lookup per message,
+    # no matter how many games are active (instead of one wait_for check per game)
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message):
+        if message.author.bot:
+            return
+        game = self.active_games.get(message.channel.id)
+        if game:
+            game.offer(message)
+
+    # Helper function to pick a random word: never waits on the network
+    def fetch_word(self) -> str:
+        word = self.words.next_word(min_length=5, max_length=9) # 5 to 9 letters for a better gameplay experience
+        if HANGMAN_WORD_API:
+            # Top up the remote word buffer in the background for future games
+            self.words.refill(self.session, HANGMAN_WORD_API)
+        return word
 
     @app_commands.command(name="hangman", description="Start a game of Hangman!")
     @app_commands.describe(
@@ -215,7 +396,7 @@ class Hangman(commands.Cog):
         # This prevents the "Interaction failed" message if setup takes a moment.
         await interaction.response.defer()
 
-        word = await self.fetch_word()
+        word = self.fetch_word()
         if not word:
             await interaction.followup.send("❌ Could not fetch a word. Please try again later.", ephemeral=True)
             return
@@ -234,20 +415,16 @@ class Hangman(commands.Cog):
             players_for_game = None # Set to None to indicate Free For All mode where anyone can guess
 
         # Create a new HangmanGame instance for this channel
-        game = HangmanGame(self.bot, interaction.channel, word, players_for_game) # Pass bot instance
+        game = HangmanGame(self.bot, interaction.channel, word, players_for_game, store=self.snapshots) # Pass bot instance
         # Store the game instance in the active_games dictionary
         self.active_games[interaction.channel_id] = game
 
         # Send a quick confirmation message to the user who started the game
         await interaction.followup.send(f"✅ Starting a Hangman game in `{mode.upper()}` mode. Check the channel for the game! You have 60 seconds per guess. Use `/hangman stop` to end the game early.", ephemeral=True)
 
-        # Start the game (sends the initial message and enters the game loop)
-        await game.start()
-
-        # After game.start() finishes (meaning the game loop has ended), clean up
-        if interaction.channel_id in self.active_games: # Ensure it's still there before deleting
-            del self.active_games[interaction.channel_id]
-            print(f"Hangman game in channel {interaction.channel_id} ended and cleaned up.")
+        # Start the game (sends the initial message and enters the game loop),
+        # then clean up once the game loop has ended
+        await self.run_game(interaction.channel_id, game.start())
 
 
     @app_commands.command(name="stop", description="Stop the current Hangman game in this channel.")
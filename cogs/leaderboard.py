@@ -1,25 +1,44 @@
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord import app_commands
-from pymongo import MongoClient
-from config import MONGO_URL
+from utils.leaderboard import BalanceLeaderboard
+
+LEADERBOARD_SIZE = 20
 
 class Leaderboard(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        # IMPORTANT: This must point to the SAME collection where coinflip stores balances
-        # Based on your coinflip, this should be 'users' and not 'daily'
-        self.client = MongoClient(MONGO_URL)
-        self.db = self.client.hxhbot.users # Corrected: Should be 'users' collection
+        # Shared async repository for the 'users' collection (the same one coinflip stores balances in)
+        self.db = bot.db
+        # Ranked top balances kept in memory, so /leaderboard never scans the collection
+        self.board = BalanceLeaderboard(size=LEADERBOARD_SIZE)
+
+    async def cog_load(self):
+        # Keep the board up to date from every balance change the economy cogs make
+        self.db.add_listener(self.board.on_user_update)
+        self.reconcile_board.start()
+
+    async def cog_unload(self):
+        self.reconcile_board.cancel()
+        self.db.remove_listener(self.board.on_user_update)
+
+    @tasks.loop(minutes=5)
+    async def reconcile_board(self):
+        # Periodically re-sync with Mongo to correct any drift
+        try:
+            await self.board.reconcile(self.db)
+        except Exception as e:
+            print(f"Error reconciling leaderboard: {e}")
 
     @app_commands.command(name="leaderboard", description="View the top 20 richest members")
     async def leaderboard(self, interaction: discord.Interaction):
         await interaction.response.defer()  # Defer to prevent timeout
 
-        # IMPORTANT: Sort by "balance" field, not "coins"
-        # Ensure the balance is treated as a number in MongoDB for correct sorting
-        # If your 'balance' field could be a string, you might need to convert it to int in your database or query
-        top_users = list(self.db.find({"balance": {"$exists": True}}).sort("balance", -1).limit(20))
+        if not self.board.loaded:
+            # The startup load failed (e.g. Mongo was unreachable), try again now
+            await self.board.reconcile(self.db)
+
+        top_users = self.board.top(LEADERBOARD_SIZE)
         
         if not top_users:
             return await interaction.followup.send("❌ There are no rich people yet!") # Changed message slightly
@@ -31,24 +50,20 @@ class Leaderboard(commands.Cog):
         )
 
         # Build the description string
-        for index, user in enumerate(top_users, start=1):
-            user_id = int(user["_id"]) # Ensure user_id is an integer if used with get_member
-            member = interaction.guild.get_member(user_id) # Try to get the member from cache
+        for index, (user_id, balance) in enumerate(top_users, start=1):
+            member = interaction.guild.get_member(int(user_id)) # Try to get the member from cache
             
             # Use member's display name if found, otherwise fall back to a mention
             name = member.display_name if member else f"<@{user_id}>"
             
-            # IMPORTANT: Get balance from the "balance" field, not "coins"
-            balance = user.get("balance", 0) 
-            
             embed.description += f"**{index}.** {name} — ₱{balance:,}\n" # Added comma formatting for balance
 
-        await interaction.followup.send(embed=embed)
+        # Show the caller's own rank (answered from memory unless they're outside the tracked window)
+        rank, balance = await self.board.get_rank(self.db, str(interaction.user.id))
+        if rank is not None:
+            embed.set_footer(text=f"Your rank: #{rank:,} — ₱{balance:,}")
 
-    def cog_unload(self):
-        # Good practice: Close the MongoDB client when the cog is unloaded
-        self.client.close()
-        print("Leaderboard MongoDB client closed.")
+        await interaction.followup.send(embed=embed)
 
 async def setup(bot):
-    await bot.add_cog(Leaderboard(bot))
\ No newline at end of file
+    await bot.add_cog(Leaderboard(bot))
@@ -0,0 +1,62 @@
+import discord
+from discord.ext import commands
+from discord import app_commands
+from utils.metrics import METRICS
+
+MAX_ROWS = 15 # Slowest operations shown by /metrics
+
+# Which operations /metrics can be narrowed down to (prefixes of the names in utils/metrics.py)
+LAYERS = [
+    app_commands.Choice(name="Slash commands", value="app."),
+    app_commands.Choice(name="Text commands", value="command."),
+    app_commands.Choice(name="Database", value="db."),
+    app_commands.Choice(name="Outbound HTTP", value="http."),
+    app_commands.Choice(name="Discord API", value="discord."),
+    app_commands.Choice(name="Event loop lag", value="loop."),
+]
+
+def format_seconds(seconds: float) -> str:
+    if seconds < 1:
+        return f"{seconds * 1000:.1f}ms"
+    return f"{seconds:.2f}s"
+
+class Metrics(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    @app_commands.command(name="metrics", description="(Admin) Latency of commands, DB and HTTP calls, slowest first.")
+    @app_commands.describe(layer="Only show one kind of operation")
+    @app_commands.choices(layer=LAYERS)
+    @app_commands.default_permissions(administrator=True)
+    @app_commands.guild_only()
+    async def metrics(self, interaction: discord.Interaction, layer: app_commands.Choice[str] = None):
+        if not interaction.permissions.administrator:
+            return await interaction.response.send_message("❌ Only administrators can use this command.", ephemeral=True)
+
+        rows = METRICS.report(layer.value if layer else "")
+        embed = discord.Embed(
+            title=f"⏱️ Latency — {layer.name if layer else 'everything'}",
+            description="p50 / p99 / max, slowest p99 first (since the bot started)",
+            color=discord.Color.blurple()
+        )
+        lines = [
+            f"`{name}` ×{stats['count']:,} — {format_seconds(stats['p50'])} / "
+            f"**{format_seconds(stats['p99'])}** / {format_seconds(stats['max'])}"
+            for name, stats in rows[:MAX_ROWS]
+        ]
+        embed.add_field(name="Operations", value="\n".join(lines)[:1024] or "Nothing recorded yet.", inline=False)
+
+        gauges = METRICS.read_gauges()
+        if gauges and not layer:
+            embed.add_field(
+                name="Now",
+                value="\n".join(f"`{name}`: {value:,.3f}".rstrip("0").rstrip(".") for name, value in gauges.items()),
+                inline=False
+            )
+        if len(rows) > MAX_ROWS:
+            embed.set_footer(text=f"{len(rows) - MAX_ROWS} more operation(s) on the keep-alive server's /metrics page.")
+
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+async def setup(bot):
+    await bot.add_cog(Metrics(bot))
@@ -1,16 +1,13 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import random
 import asyncio
-from pymongo import MongoClient
 from datetime import datetime, timedelta # Ensure datetime and timedelta are imported
-from config import MONGO_URL # Assuming config.py is in the same directory
+from utils.locks import exclusive
+from utils import outcomes
 
-# Configuration for rob amounts and cooldown
+# Configuration for rob cooldown
 ROB_COOLDOWN_HOURS = 24 # 1 day cooldown
-MAX_ROB_AMOUNT = 200
-MIN_ROB_AMOUNT = 1
 
 # Custom rob emoji
 ROB_EMOJI = "<a:rob:1376799725986119790>"
@@ -18,22 +15,16 @@ ROB_EMOJI = "<a:rob:1376799725986119790>"
 # IMPORTANT: Add the Anti-Rob emoji here as well, consistent with shop.py and use.py
 ANTI_ROB_EMOJI = "<:antirob:1376801124656349214>"
 
-# Scaling tiers for robbed amount based on target's balance
-ROB_TIERS = {
-    "very_low": {"max_balance": 50, "rob_min": 1, "rob_max": 20},
-    "low": {"max_balance": 200, "rob_min": 1, "rob_max": 50},
-    "medium": {"max_balance": 500, "rob_min": 1, "rob_max": 100},
-    "high": {"max_balance": float('inf'), "rob_min": 1, "rob_max": MAX_ROB_AMOUNT} # float('inf') for effectively no upper limit
-}
-
 class Rob(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.client = MongoClient(MONGO_URL)
-        self.db = self.client.hxhbot.users # Connect to the 'users' collection
+        self.db = bot.db # Shared async repository for the 'users' collection
+        self.cooldowns = bot.cooldowns # Shared in-memory cooldowns (utils/cooldowns.py)
+        self.shields = bot.shields # Active Anti-Rob Shields, kept in memory (utils/shields.py)
 
     @app_commands.command(name="rob", description="Attempt to rob another member!")
     @app_commands.describe(target_member="The member you want to rob.")
+    @exclusive # One economy command per user at a time
     async def rob(self, interaction: discord.Interaction, target_member: discord.Member):
         robber_id = str(interaction.user.id)
         target_id = str(target_member.id)
@@ -49,14 +40,10 @@ class Rob(commands.Cog):
         if target_member.bot:
             return await interaction.followup.send("❌ You cannot rob a bot!", ephemeral=True)
 
-        # --- Fetch Robber's Data ---
-        robber_data = self.db.find_one({"_id": robber_id})
-        robber_balance = int(robber_data.get("balance", 0)) if robber_data else 0
-        rob_cooldown_until = robber_data.get("rob_cooldown") if robber_data else None
-
-        # --- Check Cooldown for Robber ---
-        if rob_cooldown_until and current_time < rob_cooldown_until:
-            remaining_time = rob_cooldown_until - current_time
+        # --- Check Cooldown for Robber (from memory once known, no DB read) ---
+        remaining_seconds = await self.cooldowns.check(robber_id, "rob")
+        if remaining_seconds:
+            remaining_time = timedelta(seconds=remaining_seconds)
             # Format cooldown message (days, hours, minutes)
             hours, remainder = divmod(remaining_time.seconds, 3600)
             minutes, seconds = divmod(remainder, 60)
@@ -79,12 +66,12 @@ class Rob(commands.Cog):
             )
 
         # --- Fetch Target's Data ---
-        target_data = self.db.find_one({"_id": target_id})
+        target_data = await self.db.get_user(target_id)
         target_balance = int(target_data.get("balance", 0)) if target_data else 0
 
-        # --- NEW ADDITION: Check if target has active Anti-Rob protection ---
-        target_anti_rob_expires_at = target_data.get("anti_rob_expires_at") if target_data else None
-        if target_anti_rob_expires_at and current_time < target_anti_rob_expires_at:
+        # --- NEW ADDITION: Check if target has active Anti-Rob protection (in-memory lookup) ---
+        target_anti_rob_expires_at = self.shields.protected_until(target_id, current_time, target_data)
+        if target_anti_rob_expires_at:
             remaining_protection_time = target_anti_rob_expires_at - current_time
             hours, remainder = divmod(remaining_protection_time.seconds, 3600)
             minutes, seconds = divmod(remainder, 60)
@@ -113,47 +100,31 @@ class Rob(commands.Cog):
             return await interaction.followup.send(f"❌ {target_member.display_name} has no ₱ to rob!", ephemeral=True)
         
         # --- Determine Rob Amount based on Target's Balance ---
-        rob_min_tier = MIN_ROB_AMOUNT
-        rob_max_tier = MAX_ROB_AMOUNT
-
-        for tier_name, tier_info in ROB_TIERS.items():
-            if target_balance <= tier_info["max_balance"]:
-                rob_min_tier = tier_info["rob_min"]
-                rob_max_tier = tier_info["rob_max"]
-                break # Found the appropriate tier
-
-        # Ensure calculated range is valid
-        rob_min_tier = max(MIN_ROB_AMOUNT, rob_min_tier)
-        rob_max_tier = min(MAX_ROB_AMOUNT, rob_max_tier)
-        
-        # Make sure rob_min_tier isn't greater than rob_max_tier
-        if rob_min_tier > rob_max_tier:
-            rob_min_tier = rob_max_tier # Fallback if range is somehow inverted
-
-        # Randomly choose amount to rob within the calculated tier, capping at target's current balance
-        rob_amount = random.randint(rob_min_tier, rob_max_tier)
-        rob_amount = min(rob_amount, target_balance) # Cannot rob more than target has
+        # Random within the target's tier, capped at their current balance
+        rob_amount = outcomes.rob_amount(target_balance)
 
         if rob_amount <= 0: # This can happen if target_balance is very low (e.g., ₱1-₱10) and rob_max_tier is low.
              return await interaction.followup.send(f"❌ {target_member.display_name} is too poor to rob any meaningful amount!", ephemeral=True)
 
         # --- Perform the Robbery ---
-        # Update robber's balance and set cooldown
-        self.db.update_one(
-            {"_id": robber_id},
-            {"$inc": {"balance": rob_amount}, "$set": {"rob_cooldown": current_time + timedelta(hours=ROB_COOLDOWN_HOURS)}},
-            upsert=True
+        # Take the money from the target first, in one atomic update that re-checks their balance
+        # and shield, so a concurrent spend or a freshly used Anti-Rob Shield can't be overdrawn.
+        target_data = await self.db.debit(
+            target_id, rob_amount,
+            require={"$or": [{"anti_rob_expires_at": {"$exists": False}}, {"anti_rob_expires_at": {"$lte": current_time}}]},
+            reason="rob"
         )
+        if target_data is None:
+            return await interaction.followup.send(
+                f"❌ {target_member.display_name} slipped away before you could rob them! Try again.", ephemeral=True
+            )
 
-        # Update target's balance
-        self.db.update_one(
-            {"_id": target_id},
-            {"$inc": {"balance": -rob_amount}},
-            upsert=True # In case target has no document yet
-        )
+        # Set the robber's cooldown and update their balance
+        self.cooldowns.arm(robber_id, "rob", ROB_COOLDOWN_HOURS * 60 * 60)
+        robber_data = await self.db.credit(robber_id, rob_amount, reason="rob")
 
-        new_robber_balance = robber_balance + rob_amount
-        new_target_balance = target_balance - rob_amount
+        new_robber_balance = int(robber_data["balance"])
+        new_target_balance = int(target_data["balance"])
 
         await interaction.followup.send(
             f"{ROB_EMOJI} You successfully robbed ₱{rob_amount:,} from {target_member.mention}!\n"
@@ -162,9 +133,5 @@ class Rob(commands.Cog):
             f"You are now on cooldown for {ROB_COOLDOWN_HOURS} hours."
         )
 
-    def cog_unload(self):
-        self.client.close()
-        print("Rob MongoDB client closed.")
-
 async def setup(bot):
     await bot.add_cog(Rob(bot))
\ No newline at end of file
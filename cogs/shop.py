@@ -1,118 +1,83 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-from pymongo import MongoClient
-from config import MONGO_URL # Assuming config.py is in the same directory
-
-# Define your custom chicken emoji
-CHICKEN_EMOJI = "<:chickenshop:1376780896149176420>"
-CHICKEN_COST = 10
-
-# New: Define Anti-Rob item details with your custom emoji
-ANTI_ROB_EMOJI = "<:antirob:1376801124656349214>" # Your custom anti-rob emoji
-ANTI_ROB_COST = 1000
+from utils.items import ITEMS
+from utils.locks import exclusive
 
 class Shop(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.client = MongoClient(MONGO_URL)
-        self.db = self.client.hxhbot.users # Connect to the same 'users' collection
+        self.db = bot.db # Shared async repository for the 'users' collection
+        self.renders = bot.renders # Cache for the static /shop embed
 
     @app_commands.command(name="shop", description="View items available for purchase.")
     async def shop(self, interaction: discord.Interaction):
+        # Built once per catalog version, then the same embed is sent every time
+        embed = self.renders.get("shop", self.build_shop_embed, version=ITEMS.version)
+        await interaction.response.send_message(embed=embed)
+
+    def build_shop_embed(self, locale: str) -> discord.Embed:
+        item_lines = "\n\n".join(
+            f"• {item.emoji} **{item.name}** - ₱{item.price:,}\n  *({item.hint})*" for item in ITEMS
+        )
         embed = discord.Embed(
             title="Totoy's Chicken Shop",
             description=(
                 f"Welcome to the finest chicken market in town! "
                 f"Spend your hard-earned ₱ to get your hands on some feathery friends.\n\n"
                 f"**Available Items:**\n"
-                f"• {CHICKEN_EMOJI} **Chicken** - ₱{CHICKEN_COST}\n"
-                f"  *(Use `/buy chicken <amount>` to purchase)*\n\n"
-                f"• {ANTI_ROB_EMOJI} **Anti-Rob Shield** - ₱{ANTI_ROB_COST}\n"
-                f"  *(Use `/buy anti-rob <amount>` to purchase. Requires `/use anti-rob` later!)*"
+                f"{item_lines}\n\n"
+                f"*Buy several at once with `/buy chicken 5, anti-rob 1`*"
             ),
             color=discord.Color.from_rgb(255, 223, 0) # Gold-like color for a shop
         )
         embed.set_thumbnail(url="https://i.imgur.com/example_chicken_shop_icon.png") # Replace with a relevant image URL
         embed.set_footer(text="🐔 Get ready for some cockfighting!")
-
-        await interaction.response.send_message(embed=embed)
+        return embed
 
     @app_commands.command(name="buy", description="Buy items from the shop.")
-    @app_commands.describe(item="The item you want to buy.", amount="The quantity to buy.")
-    async def buy(self, interaction: discord.Interaction, item: str, amount: int):
+    @app_commands.describe(
+        item="The item you want to buy, or several, e.g. 'chicken 5, anti-rob 1'.",
+        amount="The quantity to buy (for a single item)."
+    )
+    @exclusive # One economy command per user at a time
+    async def buy(self, interaction: discord.Interaction, item: str, amount: int = 1):
         user_id = str(interaction.user.id)
-        item = item.lower() # Convert item name to lowercase for consistent checking
 
         # Defer the response as we'll be interacting with the database
         await interaction.response.defer(ephemeral=False)
 
-        user_data = self.db.find_one({"_id": user_id})
-        current_balance = int(user_data.get("balance", 0)) if user_data else 0
-        chickens_owned = int(user_data.get("chickens_owned", 0)) if user_data else 0
-        # Get current anti-rob items owned
-        anti_rob_items_owned = int(user_data.get("anti_rob_items", 0)) if user_data else 0
-
-        if amount <= 0:
-            return await interaction.followup.send("❌ You need to buy at least 1 item.", ephemeral=True)
-
-        if item == "chicken":
-            total_cost = CHICKEN_COST * amount
-            if current_balance < total_cost:
-                return await interaction.followup.send(
-                    f"❌ You don't have enough money! You need ₱{total_cost:,} but only have ₱{current_balance:,}.", 
-                    ephemeral=True
-                )
-
-            # Update user's balance and chickens_owned
-            self.db.update_one(
-                {"_id": user_id},
-                {"$inc": {"balance": -total_cost, "chickens_owned": amount}},
-                upsert=True
-            )
-
-            new_balance = current_balance - total_cost
-            new_chickens_owned = chickens_owned + amount
-
-            await interaction.followup.send(
-                f"✅ You successfully bought {amount} {CHICKEN_EMOJI} **Chicken(s)** for ₱{total_cost:,}!\n"
-                f"Your new balance is ₱{new_balance:,}.\n"
-                f"You now own {new_chickens_owned} {CHICKEN_EMOJI} Chicken(s)."
-            )
-        elif item == "anti-rob": # Logic for Anti-Rob item
-            total_cost = ANTI_ROB_COST * amount
-            if current_balance < total_cost:
-                return await interaction.followup.send(
-                    f"❌ You don't have enough money! You need ₱{total_cost:,} but only have ₱{current_balance:,}.", 
-                    ephemeral=True
-                )
-            
-            # Update user's balance and anti_rob_items_owned
-            self.db.update_one(
-                {"_id": user_id},
-                {"$inc": {"balance": -total_cost, "anti_rob_items": amount}},
-                upsert=True
-            )
-
-            new_balance = current_balance - total_cost
-            new_anti_rob_items_owned = anti_rob_items_owned + amount
+        try:
+            cart = ITEMS.parse_cart(item, default_amount=amount)
+        except ValueError as e:
+            return await interaction.followup.send(str(e), ephemeral=True)
+
+        # Check the balance (and stack limits), charge it and add every item in one atomic update
+        total_cost, inc, require = ITEMS.purchase(cart)
+        user_data = await self.db.debit(user_id, total_cost, inc=inc, require=require, reason="shop")
+        if user_data is None:
+            return await self.send_purchase_failed(interaction, user_id, cart, total_cost)
+
+        bought = ", ".join(f"{amount} {item.emoji} **{item.name}(s)**" for item, amount in cart.items())
+        owned = "\n".join(f"You now own {int(user_data[item.field]):,} {item.emoji} {item.name}(s)." for item in cart)
+        await interaction.followup.send(
+            f"✅ You successfully bought {bought} for ₱{total_cost:,}!\n"
+            f"Your new balance is ₱{int(user_data['balance']):,}.\n"
+            f"{owned}"
+        )
 
-            await interaction.followup.send(
-                f"✅ You successfully bought {amount} {ANTI_ROB_EMOJI} **Anti-Rob Shield(s)** for ₱{total_cost:,}!\n"
-                f"Your new balance is ₱{new_balance:,}.\n"
-                f"You now have {new_anti_rob_items_owned} {ANTI_ROB_EMOJI} Anti-Rob Shield(s). "
-                f"Use them with a `/use anti-rob` command (coming soon!)"
-            )
-        else:
-            await interaction.followup.send(
-                f"❌ '{item}' is not a valid item in the shop. Check `/shop` for available items.", 
-                ephemeral=True
+    async def send_purchase_failed(self, interaction: discord.Interaction, user_id: str, cart: dict, total_cost: int):
+        user_data = await self.db.get_user(user_id)
+        item = ITEMS.over_limit(user_data, cart)
+        if item:
+            return await interaction.followup.send(
+                f"❌ You can only own up to {item.max_stack} {item.emoji} {item.name}(s).", ephemeral=True
             )
-
-    def cog_unload(self):
-        # Good practice: Close the MongoDB client when the cog is unloaded
-        self.client.close()
-        print("Shop MongoDB client closed.")
+        current_balance = int(user_data.get("balance", 0)) if user_data else 0
+        await interaction.followup.send(
+            f"❌ You don't have enough money! You need ₱{total_cost:,} but only have ₱{current_balance:,}.", 
+            ephemeral=True
+        )
 
 async def setup(bot):
-    await bot.add_cog(Shop(bot))
\ No newline at end of file
+    await bot.add_cog(Shop(bot))
@@ -2,9 +2,8 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 import random
-import asyncio
-from pymongo import MongoClient
-from config import MONGO_URL # Assuming config.py is in the same directory
+from utils import outcomes
+from utils.locks import exclusive
 
 # Define your custom animated spider emojis
 SPIDER_RIGHT_EMOJI = "<:spider11:1376855645931704450>"
@@ -15,8 +14,7 @@ CLASH_EMOJI = "💥" # For impact effect
 class SpiderDerby(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.client = MongoClient(MONGO_URL)
-        self.db = self.client.hxhbot.users # Connect to the 'users' collection
+        self.db = bot.db # Shared async repository for the 'users' collection
 
     @app_commands.command(name="spiderderby", description="Bet your ₱ on a thrilling spider derby!")
     @app_commands.describe(
@@ -29,24 +27,32 @@ class SpiderDerby(commands.Cog):
             app_commands.Choice(name="Left Spider", value="left"),
         ]
     )
+    @exclusive # One economy command per user at a time
     async def spiderderby(self, interaction: discord.Interaction, bet_amount: int, spider_choice: str):
         user_id = str(interaction.user.id)
 
         # Defer the response immediately to prevent timeout
         await interaction.response.defer(ephemeral=False)
 
-        user_data = self.db.find_one({"_id": user_id})
-        current_balance = int(user_data.get("balance", 0)) if user_data else 0
-
         # --- Input Validation ---
         if bet_amount <= 0:
             return await interaction.followup.send("❌ You must bet a positive amount.", ephemeral=True)
 
-        if current_balance < bet_amount:
+        # --- Determine Outcome (existing logic), decided before anything is shown ---
+        winning_spider_value = outcomes.spider_winner()
+        won = winning_spider_value == spider_choice
+
+        # Settle the bet in a single atomic update: take it (if affordable) and, on a win,
+        # pay out the stake plus the winnings in the same write
+        user_data = await self.db.debit(user_id, bet_amount, inc={"balance": outcomes.even_money_payout(won, bet_amount)}, reason="spiderderby")
+        if user_data is None:
+            user_data = await self.db.get_user(user_id)
+            current_balance = int(user_data.get("balance", 0)) if user_data else 0
             return await interaction.followup.send(
                 f"❌ You don't have enough money! You have ₱{current_balance:,} but tried to bet ₱{bet_amount:,}.",
                 ephemeral=True
             )
+        new_balance = int(user_data["balance"]) # Balance after the bet was settled
 
         # Map choice string to emoji
         chosen_spider_emoji = SPIDER_RIGHT_EMOJI if spider_choice == "right" else SPIDER_LEFT_EMOJI
@@ -71,62 +77,42 @@ class SpiderDerby(commands.Cog):
             f"🕷️⚔️🕸️", # A more condensed clash
         ]
 
-        for _ in range(7): # Loop through 7 animation steps for about 3.5 seconds of animation
-            frame = random.choice(animation_frames) # Pick a random frame each time
-            await battle_message.edit(content=f"The spiders are battling fiercely... {frame}")
-            await asyncio.sleep(0.5) # Control the speed of each frame
-
-        await battle_message.delete() # Delete the animation message before revealing the result
+        # 7 animation steps, 0.5 seconds apart (about 3.5 seconds of animation), each a random frame.
+        # Queued through the shared edit scheduler: frames that fall behind the rate limit are dropped
+        frames = []
+        for step in range(7):
+            content = f"The spiders are battling fiercely... {random.choice(animation_frames)}" # Pick a random frame each time
+            frames.append((step * 0.5, lambda content=content: self.bot.edits.edit(battle_message, content=content)))
         # --- END NEW BATTLE ANIMATION ---
 
-        # --- Determine Outcome (existing logic) ---
-        winning_spider_value = random.choice(["right", "left"])
-        
         # Map winning value to actual emoji and name
         winning_spider_emoji = SPIDER_RIGHT_EMOJI if winning_spider_value == "right" else SPIDER_LEFT_EMOJI
         winning_spider_name = "Right Spider" if winning_spider_value == "right" else "Left Spider"
 
-        if winning_spider_value == spider_choice:
+        if won:
             # Player wins
             net_change = bet_amount # Player wins their bet back, plus an equal amount (total 2x original bet)
-            new_balance = current_balance + net_change
-            
-            # Update database
-            self.db.update_one(
-                {"_id": user_id},
-                {"$inc": {"balance": net_change}},
-                upsert=True
-            )
-            
-            # Send win message
-            await interaction.followup.send(
+
+            # Win message
+            result_message = (
                 f"🎉 **VICTORY!** The **{winning_spider_name}** {winning_spider_emoji} emerged victorious!\n"
                 f"{interaction.user.mention} won ₱{net_change:,}!\n"
                 f"Your new balance is ₱{new_balance:,}."
             )
         else:
-            # Player loses
-            net_change = -bet_amount
-            new_balance = current_balance + net_change
-
-            # Update database
-            self.db.update_one(
-                {"_id": user_id},
-                {"$inc": {"balance": net_change}},
-                upsert=True
-            )
-            
-            # Send loss message
-            await interaction.followup.send(
+            # Loss message
+            result_message = (
                 f"💔 **DEFEAT!** The **{winning_spider_name}** {winning_spider_emoji} reigned supreme.\n"
                 f"{interaction.user.mention} lost ₱{bet_amount:,}.\n"
                 f"Your new balance is ₱{new_balance:,}."
             )
 
-    def cog_unload(self):
-        # Good practice: Close the MongoDB client when the cog is unloaded
-        self.client.close()
-        print("SpiderDerby MongoDB client closed.")
+        async def reveal_result():
+            await self.bot.edits.delete(battle_message) # Delete the animation message (and any pending frames) before revealing the result
+            await interaction.followup.send(result_message)
+
+        # Play the animation and reveal the result (scheduled, nothing sleeps here)
+        self.bot.reveals.schedule(user_id, 3.5, reveal_result, frames)
 
 async def setup(bot):
     await bot.add_cog(SpiderDerby(bot))
\ No newline at end of file
@@ -2,12 +2,159 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 import aiohttp
-import io
+import asyncio
+import hashlib
+import os
 import re
+from config import (
+    TIKTOK_CACHE_DIR, TIKTOK_CACHE_MAX_BYTES, TIKTOK_METADATA_TTL,
+    TIKTOK_MAX_CONCURRENT_DOWNLOADS, TIKTOK_MAX_DOWNLOADS_PER_USER, TIKTOK_MAX_DOWNLOADS_PER_GUILD,
+)
+from utils.cache import TTLCache, DiskLRU
+from utils.downloads import DownloadScheduler, QueueFull, DownloadAbandoned
+
+# Videos are streamed in chunks straight into the disk cache, so memory per
+# download stays bounded and each video is written to disk only once.
+CHUNK_SIZE = 64 * 1024
+DEFAULT_UPLOAD_LIMIT = 10 * 1024 * 1024 # Discord's upload limit outside boosted guilds (e.g. DMs)
+# Downloads are shared by every request for the video, whatever their server's upload limit, so
+# they're capped at the highest one (level 3 boosts) and each request checks its own limit
+MAX_UPLOAD_LIMIT = 100 * 1024 * 1024
+API_TIMEOUT = aiohttp.ClientTimeout(total=15)
+
+TIKTOK_URL_PATTERN = re.compile(r"https?://(www\.)?(tiktok\.com|vm\.tiktok\.com|m\.tiktok\.com|vt\.tiktok\.com)/")
+VIDEO_ID_PATTERN = re.compile(r"/(?:video|photo|v)/(\d+)")
+
+SHORT_LINK_TTL = 24 * 60 * 60
+ATTACHMENT_URL_TTL = 12 * 60 * 60 # Discord attachment links are signed and expire after about a day
+
+
+class VideoTooLarge(Exception):
+    def __init__(self, size: int, limit: int):
+        super().__init__(f"Video is {size} bytes, upload limit is {limit} bytes")
+        self.size = size
+        self.limit = limit
+
+
+async def download_to_file(resp: aiohttp.ClientResponse, path: str, limit: int):
+    """Streams the response body into `path`, aborting (and removing it) once it exceeds `limit` bytes."""
+    # Fail fast when the server already tells us the size
+    if resp.content_length and resp.content_length > limit:
+        raise VideoTooLarge(resp.content_length, limit)
+
+    size = 0
+    try:
+        with open(path, "wb") as out:
+            async for chunk in resp.content.iter_chunked(CHUNK_SIZE):
+                size += len(chunk)
+                if size > limit:
+                    raise VideoTooLarge(size, limit)
+                out.write(chunk)
+    except BaseException:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def format_size(size: int) -> str:
+    return f"{size / (1024 * 1024):.1f} MB"
+
+
+class TikTokError(Exception):
+    """A failure that should be shown to the user as is."""
+
 
 class TikTok(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.session = bot.http_session # Shared, pooled aiohttp session
+
+        # Caches keyed by the canonical video ID, so the same video posted through
+        # different links (vm./vt. short links, www, m.) is only fetched once.
+        self.short_links = TTLCache(5000, SHORT_LINK_TTL) # short link -> video ID
+        self.metadata = TTLCache(1000, TIKTOK_METADATA_TTL) # video ID -> tikwm "data"
+        self.uploads = TTLCache(5000, ATTACHMENT_URL_TTL) # video ID -> (title, Discord attachment URL)
+        self.videos = DiskLRU(TIKTOK_CACHE_DIR, TIKTOK_CACHE_MAX_BYTES, suffix=".mp4") # video ID -> MP4 on disk
+
+        # Caps concurrent downloads so a burst of /tiktok calls queues up instead of
+        # saturating bandwidth, memory and tikwm's rate limits
+        self.downloads = DownloadScheduler(
+            max_concurrent=TIKTOK_MAX_CONCURRENT_DOWNLOADS,
+            per_user=TIKTOK_MAX_DOWNLOADS_PER_USER,
+            per_guild=TIKTOK_MAX_DOWNLOADS_PER_GUILD
+        )
+
+    async def resolve_video_id(self, url: str) -> str | None:
+        """Returns the numeric TikTok video ID, following short-link redirects if needed."""
+        match = VIDEO_ID_PATTERN.search(url)
+        if match:
+            return match.group(1)
+
+        link = url.split("?")[0].rstrip("/")
+        video_id = self.short_links.get(link, None)
+        if video_id:
+            return video_id
+
+        try:
+            async with self.session.head(url, allow_redirects=True, timeout=API_TIMEOUT) as resp:
+                match = VIDEO_ID_PATTERN.search(str(resp.url))
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"Error resolving TikTok short link {url}: {e}")
+            return None
+        if not match:
+            return None
+        self.short_links.set(link, match.group(1))
+        return match.group(1)
+
+    async def fetch_metadata(self, cache_key: str, url: str) -> dict:
+        """Returns tikwm's video data, from the cache when possible."""
+        video_data = self.metadata.get(cache_key, None)
+        if video_data:
+            return video_data
+
+        api_url = f"https://tikwm.com/api/?url={url}"
+        async with self.session.get(api_url, timeout=API_TIMEOUT) as resp:
+            if resp.status != 200:
+                raise TikTokError(f"❌ Failed to fetch data from TikTok API (Status: {resp.status}).")
+            data = await resp.json()
+
+        if data.get("code") != 0:
+            error_msg = data.get("msg", "Unknown error from API.")
+            raise TikTokError(f"❌ TikTok API returned an error: {error_msg}. (This often happens with private videos or unusual TikTok links).")
+
+        video_data = data.get("data")
+        if not video_data:
+            raise TikTokError("❌ No video data found in the TikTok API response. (Could be private, unavailable, or an issue with the API).")
+
+        self.metadata.set(cache_key, video_data)
+        return video_data
+
+    async def fetch_video(self, cache_key: str, url: str) -> tuple[str, str]:
+        """Makes sure the video is in the disk cache and returns (title, path to the MP4).
+
+        The caller must have pinned `cache_key` so the file can't be evicted before it's sent.
+        """
+        cached_path = self.videos.get(cache_key)
+        if cached_path:
+            # Downloaded before: upload straight from the disk cache, with the title saved next to it
+            return self.videos.meta(cache_key).get("title", "TikTok Video"), cached_path
+
+        video_data = await self.fetch_metadata(cache_key, url)
+        video_url = video_data.get("nwm_play") or video_data.get("play")
+        title = video_data.get("title", "TikTok Video")
+
+        if not video_url:
+            raise TikTokError("❌ Could not find a downloadable video URL.")
+
+        async with self.session.get(video_url) as video_resp:
+            if video_resp.status != 200:
+                raise TikTokError(f"❌ Failed to download video (Status: {video_resp.status}).")
+            # Stream into the cache's partial file instead of reading the whole video into memory
+            await download_to_file(video_resp, self.videos.part_path(cache_key), MAX_UPLOAD_LIMIT)
+
+        return title, self.videos.add(cache_key, meta={"title": title})
 
     @app_commands.command(name="tiktok", description="Download a TikTok video without watermark!")
     @app_commands.describe(url="The URL of the TikTok video.")
@@ -15,48 +162,62 @@ class TikTok(commands.Cog):
         await interaction.response.defer(thinking=True, ephemeral=False)
 
         # UPDATED REGEX: Add vt.tiktok.com to the allowed domains
-        if not re.match(r"https?://(www\.)?(tiktok\.com|vm\.tiktok\.com|m\.tiktok\.com|vt\.tiktok\.com)/", url):
+        if not TIKTOK_URL_PATTERN.match(url):
             await interaction.followup.send("❌ That doesn't look like a valid TikTok URL. Make sure it's from tiktok.com or a common shortener like vt.tiktok.com.", ephemeral=True)
             return
 
         try:
-            async with aiohttp.ClientSession() as session:
-                api_url = f"https://tikwm.com/api/?url={url}"
-                async with session.get(api_url) as resp:
-                    if resp.status != 200:
-                        await interaction.followup.send(f"❌ Failed to fetch data from TikTok API (Status: {resp.status}).", ephemeral=True)
-                        return
-                    data = await resp.json()
-
-            if data.get("code") != 0:
-                error_msg = data.get("msg", "Unknown error from API.")
-                await interaction.followup.send(f"❌ TikTok API returned an error: {error_msg}. (This often happens with private videos or unusual TikTok links).", ephemeral=True)
-                return
+            # Fall back to a hash of the link as the cache key if it can't be resolved to an ID
+            # (the key is also the file name in the disk cache, so the raw URL can't be used)
+            cache_key = await self.resolve_video_id(url)
+            if not cache_key:
+                cache_key = "url-" + hashlib.sha1(url.split("?")[0].rstrip("/").encode()).hexdigest()
 
-            video_data = data.get("data")
-            if not video_data:
-                await interaction.followup.send("❌ No video data found in the TikTok API response. (Could be private, unavailable, or an issue with the API).", ephemeral=True)
+            # Already uploaded recently: serve it by reference, no download or upload needed
+            upload = self.uploads.get(cache_key, None)
+            if upload:
+                title, attachment_url = upload
+                await interaction.followup.send(content=f"**{title}**\n{attachment_url}")
                 return
 
-            video_url = video_data.get("nwm_play") or video_data.get("play")
-            title = video_data.get("title", "TikTok Video")
+            upload_limit = interaction.guild.filesize_limit if interaction.guild else DEFAULT_UPLOAD_LIMIT
 
-            if not video_url:
-                await interaction.followup.send("❌ Could not find a downloadable video URL.", ephemeral=True)
-                return
+            async def on_queued(position: int): # Called again whenever the queue moves
+                await interaction.edit_original_response(content=f"⏳ Lots of downloads right now, you're #{position} in the queue...")
+
+            # Pinned until it's sent, so the disk cache can't evict the file in between
+            self.videos.pin(cache_key)
+            try:
+                # Bounded and coalesced: simultaneous requests for the same video share one download
+                title, video_path = await self.downloads.run(
+                    cache_key,
+                    lambda: self.fetch_video(cache_key, url),
+                    user_id=interaction.user.id,
+                    guild_id=interaction.guild_id,
+                    on_queued=on_queued
+                )
+                video_size = os.path.getsize(video_path)
+                if video_size > upload_limit:
+                    raise VideoTooLarge(video_size, upload_limit)
 
-            async with aiohttp.ClientSession() as session:
-                async with session.get(video_url) as video_resp:
-                    if video_resp.status != 200:
-                        await interaction.followup.send(f"❌ Failed to download video (Status: {video_resp.status}).", ephemeral=True)
-                        return
-                    video_bytes = io.BytesIO(await video_resp.read())
+                message = await interaction.followup.send(
+                    content=f"**{title}**",
+                    file=discord.File(video_path, filename="tiktok_video.mp4")
+                )
+            finally:
+                self.videos.unpin(cache_key)
 
+            # Remember where Discord hosts it so repeats can link to it
+            if message.attachments:
+                self.uploads.set(cache_key, (title, message.attachments[0].url))
+
+        except (TikTokError, QueueFull, DownloadAbandoned) as e:
+            await interaction.followup.send(str(e), ephemeral=True)
+        except VideoTooLarge:
             await interaction.followup.send(
-                content=f"**{title}**",
-                file=discord.File(video_bytes, filename="tiktok_video.mp4")
+                f"❌ This video is too large to upload here (over {format_size(upload_limit)}, this server's upload limit).",
+                ephemeral=True
             )
-
         except aiohttp.ClientError as e:
             await interaction.followup.send(f"❌ A network error occurred: {e}", ephemeral=True)
         except Exception as e:
@@ -1,28 +1,22 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import random
-from pymongo import MongoClient
-from datetime import datetime, timedelta
-from config import MONGO_URL # Assuming config.py is in the same directory
-
-# Re-use Anti-Rob emoji from shop.py for consistency
-ANTI_ROB_EMOJI = "<:antirob:1376801124656349214>"
+from datetime import datetime
+from utils.items import ITEMS
+from utils.locks import exclusive
 
 class Use(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.client = MongoClient(MONGO_URL)
-        self.db = self.client.hxhbot.users # Connect to the 'users' collection
+        self.db = bot.db # Shared async repository for the 'users' collection
 
     @app_commands.command(name="use", description="Use an item from your inventory.")
     @app_commands.describe(item="The item you wish to use.")
     @app_commands.choices(
-        item=[
-            app_commands.Choice(name="Anti-Rob Shield", value="anti-rob"),
-            # Add more usable items here as your bot grows
-        ]
+        # Every item with a use-effect in data/items.json
+        item=[app_commands.Choice(name=usable.name, value=usable.id) for usable in ITEMS.usable()]
     )
+    @exclusive # One economy command per user at a time
     async def use_item(self, interaction: discord.Interaction, item: str):
         user_id = str(interaction.user.id)
         current_time = datetime.utcnow()
@@ -30,77 +24,44 @@ class Use(commands.Cog):
         # Defer the response immediately
         await interaction.response.defer(ephemeral=False)
 
-        user_data = self.db.find_one({"_id": user_id})
-        
-        # Initialize item counts for safety
-        anti_rob_items_owned = int(user_data.get("anti_rob_items", 0)) if user_data else 0
-        
-        # Get existing anti-rob expiry time if any
-        anti_rob_expires_at = user_data.get("anti_rob_expires_at") if user_data else None
-
-        if item == "anti-rob":
-            # --- Check if user owns Anti-Rob Shields ---
-            if anti_rob_items_owned <= 0:
-                return await interaction.followup.send(
-                    f"❌ You don't have any {ANTI_ROB_EMOJI} **Anti-Rob Shield(s)** to use! Buy them from `/shop`.",
-                    ephemeral=True
-                )
-            
-            # --- Check if Anti-Rob protection is already active ---
-            if anti_rob_expires_at and current_time < anti_rob_expires_at:
-                remaining_time = anti_rob_expires_at - current_time
-                hours, remainder = divmod(remaining_time.seconds, 3600)
-                minutes, seconds = divmod(remainder, 60)
-                
-                # Format remaining time
-                time_str = ""
-                if remaining_time.days > 0:
-                    time_str += f"{remaining_time.days} day{'s' if remaining_time.days > 1 else ''}"
-                if hours > 0:
-                    if time_str: time_str += ", "
-                    time_str += f"{hours} hour{'s' if hours > 1 else ''}"
-                if minutes > 0:
-                    if time_str: time_str += ", "
-                    time_str += f"{minutes} minute{'s' if minutes > 1 else ''}"
-                
-                time_str = time_str if time_str else "a few seconds"
-
-                return await interaction.followup.send(
-                    f"⏳ Your {ANTI_ROB_EMOJI} **Anti-Rob Shield** is already active for another **{time_str}**!",
-                    ephemeral=True
-                )
-
-            # --- Use Anti-Rob Shield ---
-            # Random duration: 1, 2, or 3 days
-            protection_days = random.randint(1, 3)
-            new_expiry_time = current_time + timedelta(days=protection_days)
-
-            # Update database: Decrement anti_rob_items and set expiry time
-            self.db.update_one(
-                {"_id": user_id},
-                {"$inc": {"anti_rob_items": -1}, "$set": {"anti_rob_expires_at": new_expiry_time}},
-                upsert=True # Upsert for safety, though user should exist from prior commands
+        usable = ITEMS.get(item)
+        if usable is None or usable.use is None:
+            return await interaction.followup.send(
+                f"❌ The item '{item}' is not a usable item, or its use functionality is not yet implemented.",
+                ephemeral=True
             )
 
-            new_anti_rob_items_owned = anti_rob_items_owned - 1
+        user_data = await self.db.get_user(user_id)
+        owned = int(user_data.get(usable.field, 0)) if user_data else 0
 
-            await interaction.followup.send(
-                f"✅ You used one {ANTI_ROB_EMOJI} **Anti-Rob Shield**!\n"
-                f"You are now protected from being robbed for **{protection_days} day{'s' if protection_days > 1 else ''}**."
-                f"Protection expires on: <t:{int(new_expiry_time.timestamp())}:F> (Discord Timestamp)\n" # Discord timestamp
-                f"You have {new_anti_rob_items_owned} {ANTI_ROB_EMOJI} Anti-Rob Shield(s) left."
+        # --- Check if user owns the item ---
+        if owned <= 0:
+            return await interaction.followup.send(
+                f"❌ You don't have any {usable.emoji} **{usable.name}(s)** to use! Buy them from `/shop`.",
+                ephemeral=True
             )
 
-        else:
-            # Handle other items here if you add them later
-            await interaction.followup.send(
-                f"❌ The item '{item}' is not a usable item, or its use functionality is not yet implemented.",
+        # --- Check if the effect can apply right now (e.g. a shield already active) ---
+        reason = usable.use.blocked(self.bot, user_id, current_time, usable, user_data)
+        if reason:
+            return await interaction.followup.send(reason, ephemeral=True)
+
+        # Spend one item and apply its effect in one conditional update,
+        # so two quick /use calls can't spend the same item
+        set_fields, require, details = usable.use.prepare(current_time)
+        user_data = await self.db.update_user(
+            user_id,
+            {"$inc": {usable.field: -1}, "$set": set_fields},
+            upsert=False,
+            require={usable.field: {"$gte": 1}, **require}
+        )
+        if user_data is None:
+            return await interaction.followup.send(
+                f"❌ Your {usable.emoji} **{usable.name}** could not be used. Check `/inventory` and try again.",
                 ephemeral=True
             )
 
-    def cog_unload(self):
-        self.client.close()
-        print("Use MongoDB client closed.")
+        await interaction.followup.send(usable.use.describe(usable, details, int(user_data[usable.field])))
 
 async def setup(bot):
-    await bot.add_cog(Use(bot))
\ No newline at end of file
+    await bot.add_cog(Use(bot))
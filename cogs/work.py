@@ -1,15 +1,15 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-from pymongo import MongoClient
-from config import MONGO_URL
 import random
-import time
+from utils.render import Template
+from utils.locks import exclusive
 
 class Work(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.db = MongoClient(MONGO_URL).hxhbot.users
+        self.db = bot.db
+        self.cooldowns = bot.cooldowns # Shared in-memory cooldowns (utils/cooldowns.py)
 
         self.emoji = "<:arcadiacoin:1378656679704395796>"
         self.messages = [
@@ -29,43 +29,31 @@ class Work(commands.Cog):
             "Your work has been compensated with ₱{salary} {emoji}.\nCurrent balance: ₱{balance} {emoji}.",
             "You earned ₱{salary} {emoji} for your efforts today.\nNew balance: ₱{balance} {emoji}."
         ]
+        # Parsed once with the emoji filled in, so each /work only slots in salary and balance
+        self.templates = [Template(message, emoji=self.emoji) for message in self.messages]
 
-    def is_on_cooldown(self, user_id):
-        user_data = self.db.find_one({'_id': str(user_id)})
-        now = time.time()
+    async def is_on_cooldown(self, user_id):
+        # Answered from memory once the user's cooldown is known, so spammed /work never hits the DB
+        remaining = await self.cooldowns.check(user_id, "work")
+        return remaining > 0, remaining
 
-        if not user_data or 'next_work_time' not in user_data:
-            return False, 0
-
-        next_time = user_data['next_work_time']
-        remaining = next_time - now
-
-        if remaining > 0:
-            return True, round(remaining)
-        return False, 0
-
-    def set_new_cooldown(self, user_id):
+    def new_cooldown(self):
         # Random cooldown: 3 minutes to 2 hours (180–7200 seconds)
-        cooldown_duration = random.randint(180, 7200)
-        next_time = time.time() + cooldown_duration
-        self.db.update_one(
-            {'_id': str(user_id)},
-            {'$set': {'next_work_time': next_time}},
-            upsert=True
-        )
-        return cooldown_duration
+        return random.randint(180, 7200)
 
     @commands.command(name='work')
+    @exclusive # One economy command per user at a time
     async def work_text(self, ctx):
-        is_cooldown, remaining = self.is_on_cooldown(ctx.author.id)
+        is_cooldown, remaining = await self.is_on_cooldown(ctx.author.id)
         if is_cooldown:
             await ctx.send(f"You're tired! You can work again in {remaining} seconds.")
             return
         await self.handle_work(ctx.author, ctx)
 
     @app_commands.command(name='work', description='Work to earn a salary (cooldown: 3m–2h, random)')
+    @exclusive
     async def work_slash(self, interaction: discord.Interaction):
-        is_cooldown, remaining = self.is_on_cooldown(interaction.user.id)
+        is_cooldown, remaining = await self.is_on_cooldown(interaction.user.id)
         if is_cooldown:
             await interaction.response.send_message(
                 f"You're tired! You can work again in {remaining} seconds.", ephemeral=True
@@ -78,22 +66,23 @@ class Work(commands.Cog):
     async def handle_work(self, user, ctx_or_interaction):
         salary = random.randint(1, 200)
 
-        user_data = self.db.find_one({'_id': str(user.id)})
-        balance = user_data['balance'] if user_data and 'balance' in user_data else 0
-        new_balance = balance + salary
-
-        self.db.update_one({'_id': str(user.id)}, {
-            '$set': {
-                'balance': new_balance
-            }
-        }, upsert=True)
+        cooldown_duration = self.new_cooldown()
 
-        # Set random cooldown
-        cooldown_duration = self.set_new_cooldown(user.id)
+        # Arm the random cooldown only if the user is still off cooldown, so concurrent
+        # /work calls can't both get paid, then pay the salary
+        remaining = await self.cooldowns.claim(user.id, "work", cooldown_duration)
+        if remaining:
+            return await self.send_response(ctx_or_interaction, f"You're tired! You can work again in {remaining} seconds.")
+        try:
+            user_data = await self.db.credit(user.id, salary, reason="work")
+        except Exception:
+            self.cooldowns.disarm(user.id, "work") # Not paid, so not tired either
+            raise
+        new_balance = user_data['balance']
 
         # Choose a random message
-        message_template = random.choice(self.messages)
-        message = message_template.format(salary=salary, balance=new_balance, emoji=self.emoji)
+        message_template = random.choice(self.templates)
+        message = message_template.render(salary=salary, balance=new_balance)
         message += f"\n\nNext work available in {cooldown_duration // 60} minutes."
 
         await self.send_response(ctx_or_interaction, message)
@@ -2,3 +2,60 @@ import os
 
 BOT_TOKEN = os.getenv("BOT_TOKEN")
 MONGO_URL = os.getenv("MONGO_URL")
+
+# MongoDB connection pool shared by every cog
+MONGO_POOL_SIZE = int(os.getenv("MONGO_POOL_SIZE", "20"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "2"))
+MONGO_TIMEOUT_MS = int(os.getenv("MONGO_TIMEOUT_MS", "5000"))
+
+# Write-through cache of user documents (see utils/database.py)
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "300"))
+
+# Shared aiohttp session used for all outbound HTTP (see utils/http_client.py)
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "50"))
+HTTP_POOL_PER_HOST = int(os.getenv("HTTP_POOL_PER_HOST", "10"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "10"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "30"))
+
+# /tiktok caches (see cogs/tiktok.py)
+TIKTOK_CACHE_DIR = os.getenv("TIKTOK_CACHE_DIR", "cache/tiktok")
+TIKTOK_CACHE_MAX_BYTES = int(os.getenv("TIKTOK_CACHE_MAX_BYTES", str(500 * 1024 * 1024)))
+TIKTOK_METADATA_TTL = float(os.getenv("TIKTOK_METADATA_TTL", "1800"))
+TIKTOK_MAX_CONCURRENT_DOWNLOADS = int(os.getenv("TIKTOK_MAX_CONCURRENT_DOWNLOADS", "3"))
+TIKTOK_MAX_DOWNLOADS_PER_USER = int(os.getenv("TIKTOK_MAX_DOWNLOADS_PER_USER", "1"))
+TIKTOK_MAX_DOWNLOADS_PER_GUILD = int(os.getenv("TIKTOK_MAX_DOWNLOADS_PER_GUILD", "5"))
+
+# Hangman: words come from the bundled list in data/. Set HANGMAN_WORD_API to a
+# random-word API URL to also mix in remote words, fetched in the background.
+HANGMAN_WORD_API = os.getenv("HANGMAN_WORD_API", "")
+
+# Cooldowns for /work, /daily and /rob (see utils/cooldowns.py): armed in memory,
+# written to Mongo in batches every COOLDOWN_FLUSH_INTERVAL seconds
+COOLDOWN_FLUSH_INTERVAL = float(os.getenv("COOLDOWN_FLUSH_INTERVAL", "5"))
+COOLDOWN_MEMORY_TTL = float(os.getenv("COOLDOWN_MEMORY_TTL", "600"))
+
+# Optional write-behind mode for economy credits (see utils/journal.py): winnings and
+# salaries are merged per user and written in batches, with a local log for crash safety
+WRITE_BEHIND = os.getenv("WRITE_BEHIND", "").lower() in ("1", "true", "yes")
+WRITE_BEHIND_DIR = os.getenv("WRITE_BEHIND_DIR", "journal")
+WRITE_BEHIND_INTERVAL = float(os.getenv("WRITE_BEHIND_INTERVAL", "0.25"))
+WRITE_BEHIND_MAX_OPS = int(os.getenv("WRITE_BEHIND_MAX_OPS", "500"))
+
+# How often lapsed Anti-Rob Shields are cleared from Mongo (see utils/shields.py)
+SHIELD_SWEEP_INTERVAL = float(os.getenv("SHIELD_SWEEP_INTERVAL", "60"))
+
+# Game reveals (see utils/reveals.py): past this many games in their suspense
+# phase, new games skip the animation and show the result right away
+REVEAL_MAX_ACTIVE = int(os.getenv("REVEAL_MAX_ACTIVE", "1000"))
+
+# Economy event log (see utils/events.py): every balance change is written to the
+# economy_events collection in batches, with rolling stats for the last N minutes
+ECONOMY_LOG_INTERVAL = float(os.getenv("ECONOMY_LOG_INTERVAL", "2"))
+ECONOMY_LOG_MAX_BUFFER = int(os.getenv("ECONOMY_LOG_MAX_BUFFER", "100000"))
+ECONOMY_STATS_MINUTES = int(os.getenv("ECONOMY_STATS_MINUTES", "60"))
+
+# Latency metrics (see utils/metrics.py), shown by /metrics and on the keep-alive
+# server's /metrics page. Set METRICS_TOKEN to require ?token=... on that page.
+METRICS_LOOP_LAG_INTERVAL = float(os.getenv("METRICS_LOOP_LAG_INTERVAL", "0.5"))
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
@@ -1,6 +1,8 @@
 # keep_alive.py
-from flask import Flask
+from flask import Flask, Response, abort, request
 from threading import Thread
+from config import METRICS_TOKEN
+from utils.metrics import METRICS
 
 app = Flask('')
 
@@ -8,6 +10,13 @@ app = Flask('')
 def home():
     return "I'm alive!"
 
+@app.route('/metrics')
+def metrics():
+    # Latency histograms in the Prometheus text format
+    if METRICS_TOKEN and request.args.get('token') != METRICS_TOKEN:
+        abort(403)
+    return Response(METRICS.prometheus(), mimetype='text/plain; version=0.0.4')
+
 def run():
     app.run(host='0.0.0.0', port=8080)
 
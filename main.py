@@ -1,14 +1,28 @@
 import discord
 from discord.ext import commands
 from keep_alive import keep_alive
-from config import BOT_TOKEN
+from config import BOT_TOKEN, WRITE_BEHIND
+from utils.database import UserRepository
+from utils.http_client import create_http_session
+from utils.edits import EditScheduler
+from utils.cooldowns import CooldownService
+from utils.journal import WriteBehindJournal
+from utils.shields import ShieldRegistry
+from utils.render import RenderCache
+from utils.locks import UserLocks
+from utils.reveals import RevealScheduler
+from utils.events import EconomyLog
+from utils.metrics import METRICS, MeteredTree
 import os
 import asyncio
 
 intents = discord.Intents.default()
 intents.message_content = True  # Needed for chat commands
 
-bot = commands.Bot(command_prefix="sin ", intents=intents)
+# MeteredTree stamps slash commands so METRICS can time them
+bot = commands.Bot(command_prefix="sin ", intents=intents, tree_cls=MeteredTree)
+# Latency histograms for commands and Discord API calls (DB and HTTP clients are timed where they're created)
+METRICS.install(bot)
 
 @bot.event
 async def on_ready():
@@ -20,16 +34,76 @@ async def on_ready():
         print(f'Error syncing slash commands: {e}')
 
 async def main():
-    # Load all cogs from /cogs
-    for filename in os.listdir("./cogs"):
-        if filename.endswith(".py"):
-            await bot.load_extension(f"cogs.{filename[:-3]}")
-    
-    # Start keep-alive server (if needed)
-    keep_alive()
-    
-    # Run the bot
-    await bot.start(BOT_TOKEN)
+    # One shared async MongoDB client for every cog (cogs use it as bot.db)
+    bot.db = UserRepository()
+    if WRITE_BEHIND:
+        # Buffer winnings/salaries and write them in batches (flushed again in bot.db.close())
+        bot.db.journal = WriteBehindJournal(bot.db)
+    # Log every balance change to economy_events in batches, with rolling stats (flushed again in bot.db.close())
+    bot.db.events = EconomyLog(bot.db)
+    # One pooled aiohttp session for all outbound HTTP (cogs use it as bot.http_session)
+    bot.http_session = create_http_session()
+    # Coalescing, rate-limited message edits for game animations (cogs use it as bot.edits)
+    bot.edits = EditScheduler()
+    # In-memory /work, /daily and /rob cooldowns, saved to Mongo in batches (cogs use it as bot.cooldowns)
+    bot.cooldowns = CooldownService(bot.db)
+    bot.cooldowns.start()
+    # Active Anti-Rob Shields, answered from memory (cogs use it as bot.shields)
+    bot.shields = ShieldRegistry(bot.db)
+    # Static embeds built once per locale/catalog version (cogs use it as bot.renders)
+    bot.renders = RenderCache()
+    # Per-user locks so one user can't run overlapping economy commands (see utils/locks.exclusive)
+    bot.user_locks = UserLocks()
+    # One timer heap for every game's suspense animation and result (cogs use it as bot.reveals)
+    bot.reveals = RevealScheduler()
+    # Event loop lag and a few live counters, next to the latency histograms
+    METRICS.start()
+    METRICS.gauge("reveals.active", lambda: bot.reveals.active)
+    METRICS.gauge("economy.buffered_events", lambda: bot.db.events.buffered)
+    METRICS.gauge("discord.latency_seconds", lambda: bot.latency)
+    # User document cache hit/miss counters (see UserRepository.cache_stats)
+    for stat in ("hit_rate", "hits", "misses", "size"):
+        METRICS.gauge(f"db.cache_{stat}", lambda stat=stat: bot.db.cache_stats()[stat])
+
+    try:
+        # Make sure the indexes our queries rely on exist (idempotent)
+        try:
+            for line in await bot.db.ensure_indexes():
+                print(f"Index {line}")
+        except Exception as e:
+            print(f"Error ensuring MongoDB indexes: {e}")
+
+        if bot.db.journal:
+            await bot.db.journal.start() # Replays anything a crash left unsaved
+
+        try:
+            await bot.db.events.start()
+        except Exception as e:
+            print(f"Error starting economy event log: {e}")
+
+        try:
+            await bot.shields.start()
+        except Exception as e:
+            print(f"Error loading Anti-Rob Shields: {e}")
+
+        # Load all cogs from /cogs
+        for filename in os.listdir("./cogs"):
+            if filename.endswith(".py"):
+                await bot.load_extension(f"cogs.{filename[:-3]}")
+        
+        # Start keep-alive server (if needed)
+        keep_alive()
+        
+        # Run the bot
+        await bot.start(BOT_TOKEN)
+    finally:
+        METRICS.close()
+        bot.reveals.close()
+        bot.edits.close()
+        bot.shields.close()
+        await bot.cooldowns.close() # Saves any cooldowns armed since the last flush
+        await bot.http_session.close()
+        await bot.db.close()
 
 # Run the async main() function
 asyncio.run(main())
@@ -0,0 +1,76 @@
+"""Monte Carlo simulation of the gambling games and /rob, for tuning the economy.
+
+Runs millions of rounds per game through the batch functions in
+utils/outcomes.py and reports house edge, variance and throughput.
+
+    pip install numpy
+    python simulate_games.py --rounds 5000000 --bet 100
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from utils import outcomes
+from utils.items import ITEMS
+
+
+def report(name: str, net, stake: float, seconds: float):
+    """Prints one game's stats. `net` is the player's result per round, `stake` what each round risks."""
+    mean = net.mean()
+    std = net.std()
+    house_edge = -mean / stake
+    rate = len(net) / seconds if seconds else float("inf")
+    print(f"{name:<24} {house_edge:>+10.3%} {mean:>12.3f} {std:>12.3f} {std ** 2:>14.1f} {rate:>14,.0f}")
+
+
+def scalar_rate(rounds: int, bet: int) -> float:
+    """Rounds per second for the same engine one round at a time (how the cogs use it)."""
+    rng = random.Random(0)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        outcomes.even_money_payout(outcomes.flip_coin(rng) == "head", bet)
+    return rounds / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=1_000_000, help="rounds simulated per game")
+    parser.add_argument("--bet", type=int, default=100, help="bet per round (per color for the Color Game)")
+    parser.add_argument("--seed", type=int, default=None, help="seed for reproducible runs")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    rounds, bet = args.rounds, args.bet
+    chicken_value = ITEMS.get("chicken").price
+
+    print(f"{rounds:,} rounds per game, bet ₱{bet:,}\n")
+    print(f"{'game':<24} {'house edge':>10} {'mean net':>12} {'std dev':>12} {'variance':>14} {'rounds/s':>14}")
+
+    games = [
+        ("coinflip", lambda: outcomes.batch_coinflip(rounds, bet, rng), bet),
+        ("spiderderby", lambda: outcomes.batch_spiderderby(rounds, bet, rng), bet),
+        ("cockfight", lambda: outcomes.batch_cockfight(rounds, bet, 0, rng), bet),
+        (f"cockfight (+chicken ₱{chicken_value})", lambda: outcomes.batch_cockfight(rounds, bet, chicken_value, rng), bet + chicken_value),
+    ]
+    for colors in range(1, len(outcomes.COLORS) + 1):
+        games.append((f"colorgame ({colors} color{'s' if colors > 1 else ''})",
+                      lambda colors=colors: outcomes.batch_colorgame(rounds, bet, colors, rng), bet * colors))
+
+    for name, simulate, stake in games:
+        start = time.perf_counter()
+        net = simulate()
+        report(name, net, stake, time.perf_counter() - start)
+
+    # /rob moves money between players rather than out of the economy: show how much per tier
+    print(f"\n{'rob target balance':<24} {'mean taken':>12} {'std dev':>12} {'max':>8}")
+    for balance in (10, 50, 200, 500, 1_000, 100_000):
+        taken = outcomes.batch_rob(np.full(rounds, balance), rng)
+        print(f"₱{balance:<23,} {taken.mean():>12.2f} {taken.std():>12.2f} {taken.max():>8}")
+
+    print(f"\nOne round at a time (as the cogs run it): {scalar_rate(min(rounds, 200_000), bet):,.0f} rounds/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+import asyncio
+import json
+import os
+import shutil
+import time
+from collections import OrderedDict
+
+# Returned by TTLCache.get() on a miss, so that None can be cached as a value
+MISSING = object()
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries also expire `ttl` seconds after being stored."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict() # key -> (expires_at, value), least recently used first
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=MISSING):
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value):
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False) # Evict the least recently used entry
+
+    def pop(self, key, default=None):
+        entry = self._data.pop(key, None)
+        return entry[1] if entry else default
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+class DiskLRU:
+    """Directory of cached files bounded by total size, evicting the least recently used.
+
+    Files are named `<key><suffix>`; the recency order is rebuilt from mtimes on startup.
+    Keys must be safe to use as file names. A small JSON sidecar (`<key><suffix>.json`)
+    can be stored with each file, and pinned files are never evicted.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, suffix: str = ""):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self.total_bytes = 0
+        self._files = OrderedDict() # key -> size in bytes, least recently used first
+        self._pinned = {} # key -> number of callers still using the file
+        os.makedirs(directory, exist_ok=True)
+
+        entries = []
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            if not name.endswith(suffix) or not os.path.isfile(path):
+                continue
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, name[:len(name) - len(suffix)], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._files[key] = size
+            self.total_bytes += size
+        self._evict()
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}{self.suffix}")
+
+    def meta(self, key: str) -> dict:
+        """Returns the sidecar stored with the file, or {} if it has none."""
+        try:
+            with open(self.path_for(key) + ".json", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def pin(self, key: str):
+        """Keeps `key`'s file (once stored) from being evicted until the matching `unpin()`."""
+        self._pinned[key] = self._pinned.get(key, 0) + 1
+
+    def unpin(self, key: str):
+        self._pinned[key] -= 1
+        if not self._pinned[key]:
+            del self._pinned[key]
+            self._evict() # It may have been kept over the size limit
+
+    def get(self, key: str) -> str | None:
+        """Returns the cached file's path, or None if it isn't cached."""
+        if key not in self._files:
+            return None
+        path = self.path_for(key)
+        if not os.path.exists(path):
+            self.total_bytes -= self._files.pop(key)
+            return None
+        self._files.move_to_end(key)
+        os.utime(path) # Keep the on-disk order in step for the next restart
+        return path
+
+    def part_path(self, key: str) -> str:
+        """Where to write `key`'s file before `add()` moves it into the cache."""
+        return self.path_for(key) + ".part"
+
+    def add(self, key: str, meta: dict | None = None) -> str:
+        """Moves a fully written `part_path(key)` into the cache and returns its final path."""
+        path = self.path_for(key)
+        if meta is not None:
+            with open(path + ".json", "w", encoding="utf-8") as out:
+                json.dump(meta, out)
+        os.replace(self.part_path(key), path) # Atomic, so readers never see a half-written file
+        self.total_bytes -= self._files.pop(key, 0)
+        self._files[key] = os.path.getsize(path)
+        self.total_bytes += self._files[key]
+        self._evict()
+        return path
+
+    async def store(self, key: str, fileobj, meta: dict | None = None):
+        """Copies `fileobj` (from its current position) into the cache, off the event loop."""
+        await asyncio.to_thread(self._write_part, key, fileobj)
+        self.add(key, meta)
+
+    def _write_part(self, key: str, fileobj):
+        with open(self.part_path(key), "wb") as out:
+            shutil.copyfileobj(fileobj, out)
+
+    def _evict(self):
+        for key in list(self._files): # Least recently used first
+            if self.total_bytes <= self.max_bytes:
+                break
+            if key in self._pinned:
+                continue
+            self.total_bytes -= self._files.pop(key)
+            for path in (self.path_for(key), self.path_for(key) + ".json"):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def __len__(self):
+        return len(self._files)
@@ -0,0 +1,150 @@
+import asyncio
+import heapq
+import time
+from datetime import timezone
+from config import COOLDOWN_FLUSH_INTERVAL, COOLDOWN_MEMORY_TTL
+
+DAILY_SECONDS = 24 * 60 * 60
+
+
+def _utc_timestamp(value) -> float:
+    # pymongo returns naive datetimes that are in UTC
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+# Fields the cogs used before cooldowns moved to `cooldowns.<kind>`, and how to turn
+# each into an expiry timestamp. They're still read, and dropped on the next write.
+LEGACY_FIELDS = {
+    "work": ("next_work_time", float), # Epoch seconds when /work is available again
+    "daily": ("last_claim", lambda value: _utc_timestamp(value) + DAILY_SECONDS), # When /daily was last claimed
+    "rob": ("rob_cooldown", _utc_timestamp), # When /rob is available again
+}
+
+
+class CooldownService:
+    """Per-user command cooldowns (work, daily, rob), answered from memory.
+
+    Each user's cooldowns are stored as `cooldowns.<kind>: <expiry epoch seconds>`.
+    A user's expiries are loaded once (through the repository cache) and then kept
+    in memory until COOLDOWN_MEMORY_TTL after they run out, with a heap of those
+    deadlines so forgetting them costs O(log n). A spammed command that's still on
+    cooldown never touches the database.
+
+    `arm()` only updates memory. Armed cooldowns are written to Mongo in one bulk
+    write every COOLDOWN_FLUSH_INTERVAL seconds, and once more on `close()`.
+    """
+
+    def __init__(self, db, flush_interval: float = COOLDOWN_FLUSH_INTERVAL, memory_ttl: float = COOLDOWN_MEMORY_TTL):
+        self.db = db
+        self.flush_interval = flush_interval
+        self.memory_ttl = memory_ttl
+        self._expiries = {} # (user_id, kind) -> expiry, 0 if not on cooldown
+        self._forget = [] # Heap of (forget_at, user_id, kind)
+        self._forget_at = {} # (user_id, kind) -> the forget_at its current heap entry has
+        self._dirty = {} # user_id -> {kind: expiry} not written to Mongo yet
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop())
+
+    def _remember(self, key, expiry: float, now: float):
+        self._expiries[key] = expiry
+        forget_at = max(expiry, now) + self.memory_ttl
+        self._forget_at[key] = forget_at
+        heapq.heappush(self._forget, (forget_at, *key))
+
+    def _prune(self, now: float):
+        while self._forget and self._forget[0][0] <= now:
+            forget_at, user_id, kind = heapq.heappop(self._forget)
+            key = (user_id, kind)
+            if self._forget_at.get(key) == forget_at: # Skip entries superseded by a later arm()
+                del self._forget_at[key]
+                del self._expiries[key]
+
+    async def _load(self, user_id: str, kind: str):
+        key = (user_id, kind)
+        if key in self._expiries:
+            return
+        user_data = await self.db.get_user(user_id)
+        expiry = 0.0
+        if user_data:
+            expiry = user_data.get("cooldowns", {}).get(kind, 0.0)
+            legacy_field, to_expiry = LEGACY_FIELDS.get(kind, (None, None))
+            if legacy_field and user_data.get(legacy_field) is not None:
+                expiry = max(expiry, to_expiry(user_data[legacy_field]))
+        if key not in self._expiries: # arm() may have run while we were waiting
+            self._remember(key, expiry, time.time())
+
+    async def check(self, user_id, kind: str) -> int:
+        """Returns the seconds left on the user's `kind` cooldown (0 if they're ready)."""
+        user_id = str(user_id)
+        await self._load(user_id, kind)
+        return max(0, round(self._expiries[(user_id, kind)] - time.time()))
+
+    def arm(self, user_id, kind: str, duration: float) -> float:
+        """Puts the user on a `kind` cooldown for `duration` seconds. Returns the expiry."""
+        user_id = str(user_id)
+        now = time.time()
+        expiry = now + duration
+        self._remember((user_id, kind), expiry, now)
+        self._dirty.setdefault(user_id, {})[kind] = expiry
+        return expiry
+
+    def disarm(self, user_id, kind: str, previous: float = 0.0):
+        """Undoes an `arm()`/`claim()` whose reward couldn't be paid, restoring the `previous` expiry."""
+        user_id = str(user_id)
+        self._remember((user_id, kind), previous, time.time())
+        dirty = self._dirty.get(user_id, {})
+        if kind in dirty:
+            # Never written, so Mongo still has what we're restoring
+            del dirty[kind]
+            if not dirty:
+                del self._dirty[user_id]
+        else:
+            # Already written (or being written): overwrite it
+            self._dirty.setdefault(user_id, {})[kind] = previous
+
+    async def claim(self, user_id, kind: str, duration: float) -> int:
+        """Arms the cooldown only if the user is ready, with no await between check and arm.
+
+        Returns 0 if it was armed, otherwise the seconds left, so two concurrent
+        commands can't both get through. If paying out then fails, `disarm()` it.
+        """
+        remaining = await self.check(user_id, kind)
+        if remaining:
+            return remaining
+        self.arm(user_id, kind, duration)
+        return 0
+
+    async def flush(self):
+        """Writes every armed-but-unsaved cooldown in one bulk write."""
+        self._prune(time.time())
+        if not self._dirty:
+            return
+        dirty, self._dirty = self._dirty, {}
+        updates = {}
+        for user_id, kinds in dirty.items():
+            update = {"$set": {f"cooldowns.{kind}": expiry for kind, expiry in kinds.items()}}
+            legacy = [LEGACY_FIELDS[kind][0] for kind in kinds if kind in LEGACY_FIELDS]
+            if legacy:
+                update["$unset"] = {field: "" for field in legacy} # Migrate to the new format
+            updates[user_id] = update
+        try:
+            await self.db.bulk_update(updates)
+        except Exception as e:
+            print(f"Error saving cooldowns: {e}")
+            for user_id, kinds in dirty.items(): # Retry next time, unless re-armed meanwhile
+                pending = self._dirty.setdefault(user_id, {})
+                for kind, expiry in kinds.items():
+                    pending.setdefault(kind, expiry)
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        await self.flush()
@@ -0,0 +1,355 @@
+from pymongo import AsyncMongoClient, ReturnDocument, IndexModel, UpdateOne, ASCENDING, DESCENDING
+from pymongo.errors import DuplicateKeyError, BulkWriteError
+from config import MONGO_URL, MONGO_POOL_SIZE, MONGO_MIN_POOL_SIZE, MONGO_TIMEOUT_MS, USER_CACHE_SIZE, USER_CACHE_TTL
+from utils.cache import TTLCache, MISSING
+from utils.journal import merge_inc
+from utils.metrics import METRICS
+
+
+def _present(field: str) -> dict:
+    return {field: {"$exists": True}}
+
+# Indexes on hxhbot.users, each with the queries that run against it. Fields that
+# only a few documents carry get partial indexes so they stay tiny.
+USER_INDEXES = [
+    (IndexModel([("balance", DESCENDING)], name="balance_desc"),
+     "BalanceLeaderboard.reconcile (balance $exists, sort balance desc, limit) and "
+     "BalanceLeaderboard.get_rank (count balance $gt)"),
+    (IndexModel([("afk", ASCENDING)], name="afk_partial", partialFilterExpression=_present("afk")),
+     "AFK.cog_load (afk $exists)"),
+    (IndexModel([("anti_rob_expires_at", ASCENDING)], name="anti_rob_expires_at_partial",
+                partialFilterExpression=_present("anti_rob_expires_at")),
+     "ShieldRegistry.start (find anti_rob_expires_at $gt now, then update_many anti_rob_expires_at $lte now)"),
+]
+
+# Indexes on fields that cooldowns were moved out of (see utils/cooldowns.py).
+# They index nothing once users are migrated, so they're dropped at startup.
+OBSOLETE_INDEXES = ["rob_cooldown_partial", "last_claim_partial", "next_work_time_partial"]
+
+
+class UserRepository:
+    """Async access to the hxhbot.users collection, shared by every cog.
+
+    Created once in main.py and attached to the bot as `bot.db`, so the whole
+    bot runs on a single connection pool and no DB call blocks the event loop.
+
+    User documents are kept in a write-through LRU/TTL cache: reads are served
+    from it when possible and every update stores the document Mongo returns.
+    Cached documents are shared, so callers must not mutate them.
+
+    With `journal` set (a WriteBehindJournal, see config.WRITE_BEHIND), `credit()`
+    is buffered instead of written right away, and documents read from Mongo get
+    the still-buffered deltas applied so callers always see the current balance.
+
+    With `events` set (an EconomyLog), balance changes made with a `reason` are
+    also recorded in the economy event log.
+    """
+
+    def __init__(self, url: str = MONGO_URL, pool_size: int = MONGO_POOL_SIZE):
+        self.client = AsyncMongoClient(
+            url,
+            maxPoolSize=pool_size,
+            minPoolSize=min(MONGO_MIN_POOL_SIZE, pool_size),
+            serverSelectionTimeoutMS=MONGO_TIMEOUT_MS,
+            connectTimeoutMS=MONGO_TIMEOUT_MS,
+            event_listeners=[METRICS.mongo_listener()], # Per-command latency (see utils/metrics.py)
+        )
+        self.database = self.client.hxhbot
+        self.users = self.database.users
+        self.cache = TTLCache(USER_CACHE_SIZE, USER_CACHE_TTL)
+        self._listeners = [] # Called with the updated document after every write
+        self.journal = None # Optional WriteBehindJournal for credits
+        self.events = None # Optional EconomyLog for balance changes made with a reason
+        # user_id -> [reads in flight, writes finished since], only while reads are in flight,
+        # so a read that a write overtook isn't cached
+        self._reads = {}
+
+    def add_listener(self, listener):
+        """Registers `listener(doc)` to be called after every successful user update."""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self, doc: dict):
+        for listener in self._listeners:
+            listener(doc)
+
+    def _overlay(self, user_id: str, doc: dict | None) -> dict | None:
+        # Mongo doesn't have buffered credits yet, so add them to what it returned
+        if self.journal is None:
+            return doc
+        return self.journal.overlay(user_id, doc)
+
+    def _generation(self) -> int | None:
+        return self.journal.generation if self.journal else None
+
+    def _begin_read(self, user_id: str) -> int:
+        entry = self._reads.setdefault(user_id, [0, 0])
+        entry[0] += 1
+        return entry[1]
+
+    def _end_read(self, user_id: str, writes: int) -> bool:
+        """Returns True if no write for the user finished since the matching `_begin_read()`."""
+        entry = self._reads[user_id]
+        entry[0] -= 1
+        if not entry[0]:
+            del self._reads[user_id]
+        return entry[1] == writes
+
+    def _wrote(self, user_ids=None):
+        # Called after a write finishes (or fails), for `user_ids` or, if None, anyone
+        if user_ids is None:
+            user_ids = list(self._reads)
+        for user_id in user_ids:
+            entry = self._reads.get(str(user_id))
+            if entry:
+                entry[1] += 1
+
+    def _log(self, user_id, reason: str | None, delta: int, stake: int = 0):
+        if self.events is not None and reason and (delta or stake):
+            self.events.record(user_id, reason, delta, stake)
+
+    async def get_user(self, user_id) -> dict | None:
+        """Returns the user's document, or None if they have never used the bot."""
+        user_id = str(user_id)
+        doc = self.cache.get(user_id)
+        if doc is not MISSING:
+            return doc
+        for _ in range(3):
+            generation = self._generation()
+            writes = self._begin_read(user_id)
+            try:
+                doc = self._overlay(user_id, await self.users.find_one({"_id": user_id}))
+            finally:
+                unchanged = self._end_read(user_id, writes)
+            if unchanged and self._generation() == generation:
+                self.cache.set(user_id, doc)
+                return doc
+            # A write for this user (or a journal batch) was saved while we read, so the
+            # document may be outdated already, or the overlay may be wrong: read again
+        return doc # Writes kept overlapping, so don't cache what may be stale
+
+    async def update_user(self, user_id, update: dict, upsert: bool = True, require: dict | None = None) -> dict | None:
+        """Applies a raw update ($inc/$set/$unset...) and returns the updated document.
+
+        `require` adds extra filter conditions (e.g. a cooldown check), making the
+        update conditional: if they don't hold nothing is written and None is returned.
+        """
+        user_id = str(user_id)
+        query = {"_id": user_id}
+        if require:
+            query.update(require)
+        generation = self._generation()
+        try:
+            doc = await self.users.find_one_and_update(
+                query,
+                update,
+                upsert=upsert,
+                return_document=ReturnDocument.AFTER,
+            )
+            self._wrote([user_id])
+        except DuplicateKeyError:
+            self._wrote([user_id])
+            # The upsert tried to insert a second document because the user exists
+            # but `require` didn't match, so this is a failed condition.
+            if not require:
+                raise
+            doc = None
+        except Exception:
+            # The write may or may not have been applied, so don't trust the cached copy
+            self._wrote([user_id])
+            self.cache.pop(user_id)
+            raise
+        if doc is None and require:
+            # A failed condition means our cached copy may be stale
+            self.cache.pop(user_id)
+            if self.journal and self.journal.has_pending(user_id) and await self.journal.flush():
+                # The condition was checked without this user's buffered credits, retry with them saved
+                return await self.update_user(user_id, update, upsert=upsert, require=require)
+            return None
+
+        doc = self._overlay(user_id, doc)
+        if self._generation() != generation:
+            # A journal batch was saved during the write and may be missing from `doc`,
+            # so re-read it (the update itself is already applied)
+            self.cache.pop(user_id)
+            doc = await self.get_user(user_id)
+        else:
+            self.cache.set(user_id, doc)
+        self._notify(doc)
+        return doc
+
+    async def debit(self, user_id, amount: int, inc: dict | None = None, set_fields: dict | None = None,
+                    require: dict | None = None, reason: str | None = None) -> dict | None:
+        """Atomically takes `amount` from the user's balance, only if they can afford it.
+
+        The balance check and the debit happen in one round-trip, so concurrent bets
+        can't overdraw. `inc`/`set_fields` are applied in the same write (e.g. items
+        bought) and `require` adds extra conditions (e.g. owning a chicken).
+        `reason` (e.g. "coinflip") logs the net change with `amount` as the stake.
+        Returns the updated document, or None if the user can't afford it.
+        """
+        increments = dict(inc or {})
+        increments["balance"] = increments.get("balance", 0) - amount
+        update = {"$inc": increments}
+        if set_fields:
+            update["$set"] = set_fields
+        conditions = {"balance": {"$gte": amount}}
+        if require:
+            conditions.update(require)
+        doc = await self.update_user(user_id, update, upsert=False, require=conditions)
+        if doc is not None:
+            self._log(user_id, reason, increments["balance"], amount)
+        return doc
+
+    async def adjust_balance(self, user_id, amount: int, reason: str | None = None) -> dict | None:
+        """Adds `amount` (negative to subtract) to the user's balance."""
+        doc = await self.update_user(user_id, {"$inc": {"balance": amount}})
+        self._log(user_id, reason, amount)
+        return doc
+
+    async def credit(self, user_id, amount: int = 0, inc: dict | None = None, reason: str | None = None) -> dict:
+        """Adds `amount` to the balance (and any `inc` counters), e.g. for winnings or salaries.
+
+        Goes through the write-behind journal when it's enabled: the change is
+        applied to the cached document right away and reaches Mongo with the next
+        batch. `reason` (e.g. "work") logs it in the economy event log.
+        Returns the updated document either way.
+        """
+        increments = dict(inc or {})
+        if amount:
+            increments["balance"] = increments.get("balance", 0) + amount
+        if self.journal is None:
+            doc = await self.update_user(user_id, {"$inc": increments})
+            self._log(user_id, reason, increments.get("balance", 0))
+            return doc
+
+        user_id = str(user_id)
+        doc = dict(await self.get_user(user_id) or {"_id": user_id})
+        self.journal.record(user_id, increments)
+        self._wrote([user_id])
+        merge_inc(doc, increments)
+        self.cache.set(user_id, doc)
+        self._notify(doc)
+        self._log(user_id, reason, increments.get("balance", 0))
+        return doc
+
+    async def inc_fields(self, user_id, fields: dict) -> dict | None:
+        return await self.update_user(user_id, {"$inc": fields})
+
+    async def set_fields(self, user_id, fields: dict) -> dict | None:
+        return await self.update_user(user_id, {"$set": fields})
+
+    async def unset_fields(self, user_id, *fields: str) -> dict | None:
+        return await self.update_user(user_id, {"$unset": {field: "" for field in fields}}, upsert=False)
+
+    async def bulk_update(self, updates: dict, upsert: bool = True):
+        """Applies {user_id: update} in one unordered bulk write.
+
+        Meant for background writes (e.g. cooldown flushes) that don't need the
+        updated documents back, so the affected users are just evicted from the cache.
+        """
+        if not updates:
+            return
+        requests = [UpdateOne({"_id": str(user_id)}, update, upsert=upsert) for user_id, update in updates.items()]
+        try:
+            await self.users.bulk_write(requests, ordered=False)
+        finally:
+            self._wrote(updates)
+            for user_id in updates:
+                self.cache.pop(str(user_id))
+
+    async def update_many(self, query: dict, update: dict, user_ids: list | None = None) -> int:
+        """Applies `update` to every user matching `query` (and in `user_ids`, if given).
+
+        Cached copies of `user_ids` are evicted, or the whole cache if the update
+        isn't scoped to known users. Returns how many documents were modified.
+        """
+        query = dict(query)
+        if user_ids is not None:
+            user_ids = [str(user_id) for user_id in user_ids]
+            query["_id"] = {"$in": user_ids}
+        try:
+            result = await self.users.update_many(query, update)
+        finally:
+            self._wrote(user_ids)
+            if user_ids is None:
+                self.cache.clear()
+            else:
+                for user_id in user_ids:
+                    self.cache.pop(user_id)
+        return result.modified_count
+
+    async def apply_batch(self, batch_id: str, deltas: dict):
+        """Applies a write-behind batch of {user_id: {field: amount}} increments.
+
+        Each user document records the last batch applied to it, so a batch that's
+        retried or replayed after a crash is only applied once per user. The cache
+        already holds these deltas and is left alone.
+        """
+        requests = [
+            UpdateOne(
+                {"_id": user_id, "journal_batch": {"$ne": batch_id}},
+                {"$inc": inc, "$set": {"journal_batch": batch_id}},
+                upsert=True,
+            )
+            for user_id, inc in deltas.items()
+        ]
+        if not requests:
+            return
+        try:
+            await self.users.bulk_write(requests, ordered=False)
+        except BulkWriteError as e:
+            # Duplicate key = the user already has this batch (the upsert found no match)
+            if e.details.get("writeConcernErrors") or any(error["code"] != 11000 for error in e.details["writeErrors"]):
+                raise
+
+    async def find_users(self, query: dict, sort: list | None = None, limit: int = 0, projection: dict | None = None) -> list[dict]:
+        """Runs a multi-document query, e.g. for the leaderboard."""
+        if self.journal and projection and all(projection.values()):
+            projection = {**projection, "journal_batch": 1} # Needed to overlay buffered credits correctly
+        cursor = self.users.find(query, projection)
+        if sort:
+            cursor = cursor.sort(sort)
+        if limit:
+            cursor = cursor.limit(limit)
+        docs = await cursor.to_list(length=limit or None)
+        if self.journal:
+            # Only to fields the query returned, so projections are respected
+            docs = [self.journal.overlay(doc["_id"], doc, only_present=True) for doc in docs]
+        return docs
+
+    async def ensure_indexes(self) -> list[str]:
+        """Creates any missing USER_INDEXES (a no-op for ones that already exist)
+        and drops OBSOLETE_INDEXES.
+
+        Returns a report line per index, saying which queries it covers.
+        """
+        await self.users.create_indexes([model for model, _ in USER_INDEXES])
+        existing = {index["name"] async for index in await self.users.list_indexes()}
+        report = []
+        for name in OBSOLETE_INDEXES:
+            if name in existing:
+                await self.users.drop_index(name)
+                report.append(f"[dropped] {name}: obsolete")
+        for model, covers in USER_INDEXES:
+            name = model.document["name"]
+            status = "ok" if name in existing else "MISSING"
+            report.append(f"[{status}] {name}: {covers}")
+        return report
+
+    async def count_users(self, query: dict) -> int:
+        return await self.users.count_documents(query)
+
+    def cache_stats(self) -> dict:
+        return self.cache.stats()
+
+    async def close(self):
+        if self.events:
+            await self.events.close() # Last flush of logged events
+        if self.journal:
+            await self.journal.close() # Last flush of buffered credits
+        await self.client.close()
+        print("MongoDB client closed.")
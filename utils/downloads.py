@@ -0,0 +1,131 @@
+import asyncio
+from collections import Counter
+
+
+class QueueFull(Exception):
+    """Raised when a user or guild already has too many downloads queued. The message is user-facing."""
+
+
+class DownloadAbandoned(Exception):
+    """Raised to requests sharing a download whose leader was cancelled. The message is user-facing."""
+
+
+class DownloadScheduler:
+    """Runs download jobs with a global concurrency cap, per-user/per-guild queue limits
+    and single-flight coalescing.
+
+    Jobs are identified by a key (e.g. a video ID). While a job is queued or running,
+    anyone else asking for the same key simply waits for its result instead of
+    starting a second download, and doesn't count against their own limits.
+    """
+
+    def __init__(self, max_concurrent: int, per_user: int, per_guild: int):
+        self.max_concurrent = max_concurrent
+        self.per_user = per_user
+        self.per_guild = per_guild
+        self.running = 0
+        self._slots = asyncio.Semaphore(max_concurrent) # FIFO, so the queue is served in order
+        self._in_flight = {} # key -> Future shared by every request for that key
+        self._queue = [] # keys waiting for a slot, oldest first
+        self._queue_moved = asyncio.Event() # Set (and replaced) whenever a key leaves the queue
+        self._user_jobs = Counter()
+        self._guild_jobs = Counter()
+
+    @property
+    def queued(self) -> int:
+        return len(self._queue)
+
+    def position(self, key) -> int | None:
+        """1-based position of a queued job, or None if it's running or unknown."""
+        try:
+            return self._queue.index(key) + 1
+        except ValueError:
+            return None
+
+    async def run(self, key, job, user_id=None, guild_id=None, on_queued=None):
+        """Runs `await job()` under the scheduler's limits and returns its result.
+
+        `on_queued(position)` is awaited if the job has to wait for a free slot, and
+        again whenever its position in the queue changes.
+        """
+        future = self._in_flight.get(key)
+        if future is not None:
+            # Someone is already fetching this: share their result.
+            # shield() so one impatient waiter can't cancel it for everyone.
+            return await asyncio.shield(future)
+
+        if user_id is not None and self._user_jobs[user_id] >= self.per_user:
+            raise QueueFull("❌ You already have a download in progress. Please wait for it to finish.")
+        if guild_id is not None and self._guild_jobs[guild_id] >= self.per_guild:
+            raise QueueFull("❌ This server already has too many downloads queued. Please try again in a moment.")
+
+        future = asyncio.get_running_loop().create_future()
+        # Nobody may be waiting on it; mark the exception as retrieved so asyncio doesn't warn
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._in_flight[key] = future
+        self._user_jobs[user_id] += 1
+        self._guild_jobs[guild_id] += 1
+        try:
+            self._queue.append(key)
+            try:
+                await self._wait_for_slot(key, on_queued)
+            finally:
+                self._queue.remove(key)
+                self._queue_moved.set()
+                self._queue_moved = asyncio.Event()
+
+            self.running += 1
+            try:
+                result = await job()
+            except Exception as e:
+                future.set_exception(e)
+                raise
+            finally:
+                self.running -= 1
+                self._slots.release()
+
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            # Failed outside the job (e.g. on_queued raised) or cancelled at any point: settle
+            # the future so requests sharing it get an answer instead of waiting forever or
+            # being cancelled along with this one
+            if not future.done():
+                if isinstance(e, asyncio.CancelledError):
+                    future.set_exception(DownloadAbandoned("❌ The download was cancelled. Please try again."))
+                else:
+                    future.set_exception(e)
+            raise
+        finally:
+            del self._in_flight[key]
+            self._release(self._user_jobs, user_id)
+            self._release(self._guild_jobs, guild_id)
+
+    async def _wait_for_slot(self, key, on_queued):
+        acquire = asyncio.ensure_future(self._slots.acquire())
+        reported = None
+        try:
+            while not acquire.done():
+                position = self.position(key)
+                if on_queued and position != reported and (self.running >= self.max_concurrent or position > 1):
+                    await on_queued(position)
+                    reported = position
+                    if acquire.done():
+                        break
+                moved = asyncio.ensure_future(self._queue_moved.wait())
+                try:
+                    await asyncio.wait({acquire, moved}, return_when=asyncio.FIRST_COMPLETED)
+                finally:
+                    moved.cancel()
+        except BaseException:
+            if acquire.done() and not acquire.cancelled() and acquire.exception() is None:
+                self._slots.release() # Got the slot just as we failed, give it back
+            else:
+                acquire.cancel()
+            raise
+
+    @staticmethod
+    def _release(counter: Counter, key):
+        counter[key] -= 1
+        if counter[key] <= 0:
+            del counter[key]
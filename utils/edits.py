@@ -0,0 +1,146 @@
+import asyncio
+import time
+
+import discord
+
+# Discord allows roughly 5 message edits per 5 seconds per channel
+EDIT_BUCKET_SIZE = 5
+EDIT_BUCKET_PERIOD = 5.0
+
+
+class _PendingEdit:
+    __slots__ = ("message", "fields", "final", "futures")
+
+    def __init__(self, message, fields, final):
+        self.message = message
+        self.fields = fields
+        self.final = final
+        self.futures = []
+
+
+class _ChannelEdits:
+    """Pending edits and token bucket for one channel (Discord's edit rate-limit bucket)."""
+
+    def __init__(self):
+        self.pending = {} # message id -> _PendingEdit, in arrival order
+        self.tokens = float(EDIT_BUCKET_SIZE)
+        self.updated_at = time.monotonic()
+        self.worker = None
+        self.wake = asyncio.Event() # Set when an edit is queued
+
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(EDIT_BUCKET_SIZE, self.tokens + (now - self.updated_at) * EDIT_BUCKET_SIZE / EDIT_BUCKET_PERIOD)
+        self.updated_at = now
+
+    def time_to_full(self) -> float:
+        self.refill()
+        return (EDIT_BUCKET_SIZE - self.tokens) * EDIT_BUCKET_PERIOD / EDIT_BUCKET_SIZE
+
+    async def take_token(self):
+        while True:
+            self.refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) * EDIT_BUCKET_PERIOD / EDIT_BUCKET_SIZE)
+
+    def next_edit(self) -> _PendingEdit:
+        # Final results jump ahead of animation frames
+        for message_id, pending in self.pending.items():
+            if pending.final:
+                return self.pending.pop(message_id)
+        return self.pending.pop(next(iter(self.pending)))
+
+
+class EditScheduler:
+    """Coalescing, rate-limit-aware message edits, shared by the game cogs as `bot.edits`.
+
+    Only the latest pending content per message is kept, so a burst of edits
+    collapses into one and animation frames that fall behind are dropped.
+    Each channel is paced by its own token bucket, and edits marked `final`
+    are sent before any pending animation frames in that channel. A channel is
+    forgotten once its edits are done and its bucket has refilled.
+    """
+
+    def __init__(self):
+        self._channels = {} # channel id -> _ChannelEdits
+
+    def edit(self, message: discord.Message, *, final: bool = False, **fields) -> asyncio.Future:
+        """Queues `message.edit(**fields)`. Await the returned future to know when it landed.
+
+        Frames (final=False) may be superseded by a later edit; the future then
+        resolves when the edit that replaced it is sent.
+        """
+        channel = self._channels.setdefault(message.channel.id, _ChannelEdits())
+        future = asyncio.get_running_loop().create_future()
+        # Callers may not await it; mark errors as retrieved so asyncio doesn't warn
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+
+        previous = channel.pending.pop(message.id, None)
+        pending = _PendingEdit(message, fields, final or (previous is not None and previous.final))
+        if previous:
+            # Merge: keep earlier fields the new edit doesn't override (e.g. view=None)
+            pending.fields = {**previous.fields, **fields}
+            pending.futures = previous.futures
+        pending.futures.append(future)
+        channel.pending[message.id] = pending
+        channel.wake.set()
+
+        if channel.worker is None or channel.worker.done():
+            channel.worker = asyncio.create_task(self._run(message.channel.id, channel))
+        return future
+
+    async def delete(self, message: discord.Message, **kwargs):
+        """Deletes the message, dropping any edits still pending for it."""
+        channel = self._channels.get(message.channel.id)
+        pending = channel.pending.pop(message.id, None) if channel else None
+        if pending:
+            self._resolve(pending)
+        await message.delete(**kwargs)
+
+    async def _run(self, channel_id: int, channel: _ChannelEdits):
+        while True:
+            await self._drain(channel)
+            # Stay until the bucket is full again, so a new _ChannelEdits (with a full
+            # bucket) can't let a burst through early, then drop this one
+            channel.wake.clear()
+            try:
+                await asyncio.wait_for(channel.wake.wait(), timeout=channel.time_to_full())
+            except asyncio.TimeoutError:
+                pass
+            if not channel.pending:
+                if self._channels.get(channel_id) is channel:
+                    del self._channels[channel_id]
+                return
+
+    async def _drain(self, channel: _ChannelEdits):
+        while channel.pending:
+            await channel.take_token()
+            if not channel.pending:
+                break
+            pending = channel.next_edit() # Picked after waiting, so it's the freshest content
+            try:
+                await pending.message.edit(**pending.fields)
+            except Exception as e:
+                if not pending.final:
+                    print(f"Error editing animation frame: {e}")
+                self._resolve(pending, e if pending.final else None)
+            else:
+                self._resolve(pending)
+
+    @staticmethod
+    def _resolve(pending: _PendingEdit, error: Exception | None = None):
+        for future in pending.futures:
+            if future.done():
+                continue
+            if error:
+                future.set_exception(error)
+            else:
+                future.set_result(None)
+
+    def close(self):
+        for channel in self._channels.values():
+            if channel.worker:
+                channel.worker.cancel()
+        self._channels.clear()
@@ -0,0 +1,155 @@
+import asyncio
+import time
+from collections import deque
+from datetime import datetime, timezone
+from pymongo.errors import BulkWriteError
+from config import ECONOMY_LOG_INTERVAL, ECONOMY_LOG_MAX_BUFFER, ECONOMY_STATS_MINUTES
+
+# Kinds that move ₱ between players instead of creating or destroying it
+TRANSFER_KINDS = {"rob"}
+
+
+class MinuteStats:
+    """Aggregates for one minute of economy events."""
+
+    __slots__ = ("minute", "minted", "burned", "kinds")
+
+    def __init__(self, minute: int):
+        self.minute = minute # Epoch minutes
+        self.minted = 0
+        self.burned = 0
+        self.kinds = {} # kind -> [events, volume, net]
+
+
+class EconomyLog:
+    """Append-only log of balance changes, plus rolling per-minute aggregates.
+
+    `record()` only appends a compact event ({t, u, k, d} and the stake `s` for
+    bets and purchases) to a buffer and updates the in-memory stats, so it adds
+    nothing to the command path. A background task writes the buffer to the
+    `economy_events` collection with one insert_many every ECONOMY_LOG_INTERVAL
+    seconds. If Mongo is unreachable events are kept and retried, up to
+    ECONOMY_LOG_MAX_BUFFER of them (the oldest are dropped past that).
+
+    The aggregates cover the last ECONOMY_STATS_MINUTES minutes: ₱ minted and
+    burned per minute, and events, volume and net ₱ per kind (see `summary()`).
+    Used by the repository as `bot.db.events`.
+    """
+
+    def __init__(self, db, interval: float = ECONOMY_LOG_INTERVAL, max_buffer: int = ECONOMY_LOG_MAX_BUFFER,
+                 window: int = ECONOMY_STATS_MINUTES):
+        self.collection = db.database.economy_events
+        self.interval = interval
+        self.max_buffer = max_buffer
+        self.window = window
+        self.dropped = 0 # Events lost because the buffer overflowed
+        self._buffer = []
+        self._minutes = deque() # MinuteStats, oldest first
+        self._task = None
+
+    def record(self, user_id, kind: str, delta: int, stake: int = 0):
+        """Logs a balance change of `delta` ₱ (negative when ₱ is taken) for `kind`."""
+        now = time.time()
+        event = {"t": datetime.fromtimestamp(now, timezone.utc), "u": str(user_id), "k": kind, "d": delta}
+        if stake:
+            event["s"] = stake
+        self._buffer.append(event)
+        if len(self._buffer) > self.max_buffer:
+            del self._buffer[0]
+            self.dropped += 1
+
+        stats = self._current_minute(int(now // 60))
+        if kind in TRANSFER_KINDS:
+            volume = max(0, -delta) # Counted once, on the side it's taken from
+        else:
+            volume = stake or abs(delta)
+            if delta > 0:
+                stats.minted += delta
+            else:
+                stats.burned -= delta
+        totals = stats.kinds.setdefault(kind, [0, 0, 0])
+        totals[0] += 1
+        totals[1] += volume
+        totals[2] += delta
+
+    @property
+    def buffered(self) -> int:
+        """How many events are waiting for the next flush."""
+        return len(self._buffer)
+
+    def _current_minute(self, minute: int) -> MinuteStats:
+        if not self._minutes or self._minutes[-1].minute != minute:
+            self._minutes.append(MinuteStats(minute))
+        self._prune(minute)
+        return self._minutes[-1]
+
+    def _prune(self, minute: int):
+        while self._minutes and self._minutes[0].minute <= minute - self.window:
+            self._minutes.popleft()
+
+    def per_minute(self, minutes: int | None = None) -> list[tuple[int, int, int]]:
+        """Returns [(epoch minute, minted, burned), ...] for the last `minutes` minutes, oldest first."""
+        now = int(time.time() // 60)
+        self._prune(now)
+        since = now - min(minutes or self.window, self.window)
+        return [(stats.minute, stats.minted, stats.burned) for stats in self._minutes if stats.minute > since]
+
+    def summary(self, minutes: int | None = None) -> dict:
+        """Totals over the last `minutes` minutes (at most the window).
+
+        Returns {"minted", "burned", "kinds": {kind: {"events", "volume", "net"}}}.
+        """
+        now = int(time.time() // 60)
+        self._prune(now)
+        since = now - min(minutes or self.window, self.window)
+        minted = burned = 0
+        kinds = {}
+        for stats in self._minutes:
+            if stats.minute <= since:
+                continue
+            minted += stats.minted
+            burned += stats.burned
+            for kind, (events, volume, net) in stats.kinds.items():
+                totals = kinds.setdefault(kind, {"events": 0, "volume": 0, "net": 0})
+                totals["events"] += events
+                totals["volume"] += volume
+                totals["net"] += net
+        return {"minted": minted, "burned": burned, "kinds": kinds}
+
+    async def start(self):
+        """Starts the flush loop and creates the time index (idempotent)."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop())
+        await self.collection.create_index("t", name="t_asc")
+
+    async def flush(self):
+        """Writes every buffered event in one insert_many."""
+        if not self._buffer:
+            return
+        events, self._buffer = self._buffer, []
+        try:
+            await self.collection.insert_many(events, ordered=False)
+            return
+        except BulkWriteError as e:
+            # insert_many gave every event an _id, so ones that did get in come back as duplicates
+            events = [events[error["index"]] for error in e.details["writeErrors"] if error["code"] != 11000]
+            if not events:
+                return
+            print(f"Error saving {len(events)} economy event(s): {e}")
+        except Exception as e:
+            print(f"Error saving economy events: {e}")
+        # Keep them for the next flush, ahead of anything recorded meanwhile
+        pending = events + self._buffer
+        self.dropped += max(0, len(pending) - self.max_buffer)
+        self._buffer = pending[-self.max_buffer:]
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        await self.flush()
@@ -0,0 +1,26 @@
+import aiohttp
+from utils.metrics import METRICS
+from config import HTTP_POOL_SIZE, HTTP_POOL_PER_HOST, HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT
+
+DNS_CACHE_SECONDS = 300
+KEEPALIVE_SECONDS = 60
+
+
+def create_http_session() -> aiohttp.ClientSession:
+    """Creates the bot-wide aiohttp session (exposed as `bot.http_session`).
+
+    One pooled session means repeated requests to the same host (tikwm.com,
+    the TikTok CDN, the word API) reuse warm keep-alive connections and cached
+    DNS instead of paying a fresh TCP+TLS handshake each time.
+    Must be called from inside the running event loop.
+    """
+    connector = aiohttp.TCPConnector(
+        limit=HTTP_POOL_SIZE,
+        limit_per_host=HTTP_POOL_PER_HOST,
+        ttl_dns_cache=DNS_CACHE_SECONDS,
+        keepalive_timeout=KEEPALIVE_SECONDS,
+    )
+    # No total timeout so long video downloads can finish, but stalled connects/reads are cut off
+    timeout = aiohttp.ClientTimeout(total=None, connect=HTTP_CONNECT_TIMEOUT, sock_read=HTTP_READ_TIMEOUT)
+    # Every request's latency is recorded per host (see utils/metrics.py)
+    return aiohttp.ClientSession(connector=connector, timeout=timeout, trace_configs=[METRICS.http_trace_config()])
@@ -0,0 +1,167 @@
+import json
+import os
+import random
+import zlib
+from datetime import datetime, timedelta
+
+ITEMS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "items.json")
+MAX_PURCHASE_AMOUNT = 1_000_000 # Per item and /buy, keeps quantities and costs well within Mongo's int64
+MAX_COST = 2 ** 63 - 1
+
+
+def format_remaining(remaining: timedelta) -> str:
+    """e.g. "1 day, 3 hours, 5 minutes" (or "a few seconds")."""
+    hours, remainder = divmod(remaining.seconds, 3600)
+    minutes = remainder // 60
+    units = []
+    if remaining.days > 0:
+        units.append(f"{remaining.days} day{'s' if remaining.days > 1 else ''}")
+    if hours > 0:
+        units.append(f"{hours} hour{'s' if hours > 1 else ''}")
+    if minutes > 0:
+        units.append(f"{minutes} minute{'s' if minutes > 1 else ''}")
+    return ", ".join(units) or "a few seconds"
+
+
+class ShieldEffect:
+    """Use-effect: protects the user from /rob for a random number of days."""
+
+    field = "anti_rob_expires_at"
+
+    def __init__(self, min_days: int = 1, max_days: int = 3):
+        self.min_days = min_days
+        self.max_days = max_days
+
+    def blocked(self, bot, user_id: str, now: datetime, item, user_data: dict | None = None) -> str | None:
+        """Returns why the item can't be used right now, or None (answered from memory)."""
+        expiry = bot.shields.protected_until(user_id, now, user_data)
+        if expiry:
+            return f"⏳ Your {item.emoji} **{item.name}** is already active for another **{format_remaining(expiry - now)}**!"
+        return None
+
+    def prepare(self, now: datetime) -> tuple[dict, dict, dict]:
+        """Returns ($set fields, extra conditions, details for `describe`) for one use."""
+        days = random.randint(self.min_days, self.max_days)
+        expiry = now + timedelta(days=days)
+        # Conditional, so two quick /use calls can't stack protection
+        require = {"$or": [{self.field: {"$exists": False}}, {self.field: {"$lte": now}}]}
+        return {self.field: expiry}, require, {"days": days, "expiry": expiry}
+
+    def describe(self, item, details: dict, left: int) -> str:
+        days = details["days"]
+        return (
+            f"✅ You used one {item.emoji} **{item.name}**!\n"
+            f"You are now protected from being robbed for **{days} day{'s' if days > 1 else ''}**."
+            f"Protection expires on: <t:{int(details['expiry'].timestamp())}:F> (Discord Timestamp)\n" # Discord timestamp
+            f"You have {left} {item.emoji} {item.name}(s) left."
+        )
+
+# Use-effect types that items.json can refer to by name
+EFFECTS = {
+    "anti_rob_shield": ShieldEffect,
+}
+
+
+class Item:
+    __slots__ = ("id", "name", "emoji", "price", "field", "max_stack", "hint", "use")
+
+    def __init__(self, id: str, name: str, emoji: str, price: int, field: str, max_stack: int | None = None,
+                 hint: str = "", use=None):
+        self.id = id
+        self.name = name
+        self.emoji = emoji
+        self.price = price
+        self.field = field # Inventory count field on the user document
+        self.max_stack = max_stack # Most a user can own, None for no limit
+        self.hint = hint # Shown under the item in /shop
+        self.use = use # Use-effect, None if the item can't be /use'd
+
+
+class ItemRegistry:
+    """The shop catalog, loaded once from data/items.json.
+
+    Items are looked up by id or alias in one dict lookup. Adding an item only
+    needs a new entry in the JSON file (and, for a new kind of use-effect, an
+    entry in EFFECTS).
+    """
+
+    def __init__(self, path: str = ITEMS_PATH):
+        with open(path, "rb") as f:
+            raw = f.read()
+        self.version = zlib.crc32(raw) # Changes whenever the catalog does, for cached /shop embeds
+        self.items = []
+        self._lookup = {}
+        for entry in json.loads(raw):
+            use = entry.get("use")
+            if use:
+                use = dict(use)
+                use = EFFECTS[use.pop("effect")](**use)
+            item = Item(entry["id"], entry["name"], entry["emoji"], entry["price"], entry["field"],
+                        entry.get("max_stack"), entry.get("hint", ""), use)
+            self.items.append(item)
+            for key in (item.id, *entry.get("aliases", ())):
+                self._lookup[key.lower()] = item
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def get(self, key: str) -> Item | None:
+        return self._lookup.get(key.strip().lower())
+
+    def usable(self) -> list[Item]:
+        return [item for item in self.items if item.use]
+
+    def parse_cart(self, text: str, default_amount: int = 1) -> dict[Item, int]:
+        """Parses "chicken" or "chicken 5, anti-rob 2" into {item: amount}.
+
+        Raises ValueError with a user-facing message if it can't.
+        """
+        cart = {}
+        for part in text.split(","):
+            words = part.split()
+            if not words:
+                continue
+            amount = default_amount
+            if len(words) > 1 and words[-1].lower().lstrip("x").isdigit():
+                amount = int(words.pop().lower().lstrip("x"))
+            name = " ".join(words)
+            item = self.get(name)
+            if item is None:
+                raise ValueError(f"❌ '{name}' is not a valid item in the shop. Check `/shop` for available items.")
+            if amount <= 0:
+                raise ValueError("❌ You need to buy at least 1 item.")
+            cart[item] = cart.get(item, 0) + amount
+        if not cart:
+            raise ValueError("❌ You need to buy at least 1 item.")
+        for item, amount in cart.items():
+            if item.max_stack is not None and amount > item.max_stack:
+                raise ValueError(f"❌ You can only own up to {item.max_stack} {item.emoji} {item.name}(s).")
+            if amount > MAX_PURCHASE_AMOUNT:
+                raise ValueError(f"❌ You can buy at most {MAX_PURCHASE_AMOUNT:,} {item.emoji} {item.name}(s) at a time.")
+        if sum(item.price * amount for item, amount in cart.items()) > MAX_COST:
+            raise ValueError("❌ That order costs more ₱ than exists. Try buying fewer items.")
+        return cart
+
+    def purchase(self, cart: dict[Item, int]) -> tuple[int, dict, dict]:
+        """Returns (total cost, $inc for the items, extra conditions) to buy the whole cart in one debit."""
+        total_cost = 0
+        inc = {}
+        require = {}
+        for item, amount in cart.items():
+            total_cost += item.price * amount
+            inc[item.field] = inc.get(item.field, 0) + amount
+            if item.max_stack is not None:
+                # $not also matches users who don't own any yet
+                require[item.field] = {"$not": {"$gt": item.max_stack - amount}}
+        return total_cost, inc, require
+
+    def over_limit(self, user_data: dict | None, cart: dict[Item, int]) -> Item | None:
+        """Returns an item the cart would push past its stack limit, if any."""
+        for item, amount in cart.items():
+            owned = int(user_data.get(item.field, 0)) if user_data else 0
+            if item.max_stack is not None and owned + amount > item.max_stack:
+                return item
+        return None
+
+# Shared by /shop, /buy, /use and /inventory
+ITEMS = ItemRegistry()
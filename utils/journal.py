@@ -0,0 +1,152 @@
+import asyncio
+import json
+import os
+import time
+from config import WRITE_BEHIND_DIR, WRITE_BEHIND_INTERVAL, WRITE_BEHIND_MAX_OPS
+
+
+def merge_inc(target: dict, inc: dict):
+    """Adds every counter in `inc` into `target`, in place."""
+    for field, amount in inc.items():
+        target[field] = target.get(field, 0) + amount
+
+
+class WriteBehindJournal:
+    """Buffers economy credits ($inc deltas) and writes them to Mongo in batches.
+
+    Deltas are merged per user in memory and flushed as one bulk write every
+    WRITE_BEHIND_INTERVAL seconds, or sooner once WRITE_BEHIND_MAX_OPS have piled up.
+    Each delta is first appended to a local log segment, and segments are deleted
+    only once their batch is in Mongo. Segments left behind by a crash are replayed
+    on the next start.
+
+    Each batch is tagged with its segment's id (see UserRepository.apply_batch), so
+    replaying a batch that already reached Mongo doesn't apply it twice. The same
+    tag on a document tells `overlay()` which buffered batches it already contains.
+
+    Only credits go through here. A buffered delta never makes a balance lower, so a
+    conditional debit against Mongo can't overdraw, it can only fail early (the
+    repository flushes and retries when that happens).
+    """
+
+    def __init__(self, db, directory: str = WRITE_BEHIND_DIR, interval: float = WRITE_BEHIND_INTERVAL,
+                 max_ops: int = WRITE_BEHIND_MAX_OPS):
+        self.db = db
+        self.directory = directory
+        self.interval = interval
+        self.max_ops = max_ops
+        self._pending = {} # user_id -> merged deltas recorded in the current segment
+        self._unsaved = [] # [(segment_id, deltas)] closed segments waiting for a successful flush
+        self._ops = 0
+        self._file = None
+        self._segment = None
+        self._flush_lock = asyncio.Lock()
+        self.generation = 0 # Bumped every time a batch is saved and stops being overlaid
+        self._wake = asyncio.Event()
+        self._task = None
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, segment_id: str) -> str:
+        return os.path.join(self.directory, f"{segment_id}.log")
+
+    def _open_segment(self):
+        # time_ns keeps ids unique (and sortable) across restarts
+        self._segment = str(time.time_ns())
+        self._file = open(self._path(self._segment), "a", encoding="utf-8")
+
+    async def start(self):
+        """Replays segments left over from the last run, then starts the flush loop."""
+        for filename in sorted(os.listdir(self.directory)):
+            if not filename.endswith(".log"):
+                continue
+            deltas = {}
+            with open(os.path.join(self.directory, filename), encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        user_id, inc = json.loads(line)
+                    except ValueError:
+                        continue # Torn last line from a crash mid-write
+                    merge_inc(deltas.setdefault(user_id, {}), inc)
+            self._unsaved.append((filename[:-4], deltas))
+        if self._unsaved:
+            print(f"Replaying {len(self._unsaved)} write-behind segment(s).")
+            await self.flush()
+        self._open_segment()
+        self._task = asyncio.create_task(self._flush_loop())
+
+    def record(self, user_id: str, inc: dict):
+        """Logs a credit and queues it for the next flush."""
+        self._file.write(json.dumps([user_id, inc]) + "\n")
+        self._file.flush() # Into the OS, so it survives the bot process dying
+        merge_inc(self._pending.setdefault(user_id, {}), inc)
+        self._ops += 1
+        if self._ops >= self.max_ops:
+            self._wake.set()
+
+    def has_pending(self, user_id: str) -> bool:
+        return user_id in self._pending or any(user_id in deltas for _, deltas in self._unsaved)
+
+    def overlay(self, user_id: str, doc: dict | None, only_present: bool = False) -> dict | None:
+        """Returns `doc` with this user's not-yet-saved deltas applied (a copy if any apply).
+
+        Batches the document already has (its `journal_batch` is that batch or a later
+        one) are skipped, since a flush may have written them while `doc` was being read.
+        """
+        applied = int(doc.get("journal_batch", 0)) if doc else 0
+        batches = [deltas[user_id] for segment_id, deltas in self._unsaved
+                   if user_id in deltas and int(segment_id) > applied]
+        if user_id in self._pending:
+            batches.append(self._pending[user_id])
+        if not batches:
+            return doc
+        doc = dict(doc) if doc else {"_id": user_id}
+        for inc in batches:
+            if only_present:
+                inc = {field: amount for field, amount in inc.items() if field in doc}
+            merge_inc(doc, inc)
+        return doc
+
+    async def flush(self) -> bool:
+        """Writes everything buffered so far. Returns True if nothing is left unsaved."""
+        async with self._flush_lock:
+            if self._pending:
+                # Close the segment: new credits go to a fresh one while this batch is written
+                self._file.close()
+                self._unsaved.append((self._segment, self._pending))
+                self._pending = {}
+                self._ops = 0
+                self._open_segment()
+
+            while self._unsaved:
+                segment_id, deltas = self._unsaved[0]
+                try:
+                    await self.db.apply_batch(segment_id, deltas)
+                except Exception as e:
+                    # Retried with the same id next time, so partial writes aren't repeated
+                    print(f"Error flushing write-behind journal: {e}")
+                    return False
+                self._unsaved.pop(0)
+                self.generation += 1
+                os.remove(self._path(segment_id))
+            return True
+
+    async def _flush_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        await self.flush()
+        if self._file:
+            self._file.close()
+            # Nothing was recorded into the last segment, don't leave an empty file behind
+            if os.path.getsize(self._path(self._segment)) == 0:
+                os.remove(self._path(self._segment))
+            self._file = None
@@ -0,0 +1,90 @@
+import heapq
+
+
+class BalanceLeaderboard:
+    """Ranked top-N of balances kept in memory.
+
+    Seeded and periodically reconciled from Mongo, and updated incrementally from
+    every write the UserRepository makes (see `on_user_update`). A few extra ranks
+    beyond `size` are tracked so the top-N stays correct when a leader's balance
+    drops between reconciles.
+    """
+
+    def __init__(self, size: int = 20, slack: int = 20):
+        self.size = size
+        self.capacity = size + slack
+        self.loaded = False
+        self._balances = {} # user_id -> balance, for the top `capacity` users
+        self._complete = False # True if every user with a balance fits in _balances
+        self._reconciling = None # Updates seen while a reconcile query is running
+
+    def on_user_update(self, doc: dict | None):
+        """UserRepository listener: called with the updated document after every write."""
+        if doc and "balance" in doc:
+            self.update(doc["_id"], doc["balance"])
+
+    def update(self, user_id: str, balance: int):
+        if self._reconciling is not None:
+            self._reconciling[user_id] = balance
+
+        if self._complete and (user_id in self._balances or len(self._balances) < self.capacity):
+            # Every user with a balance is tracked, so any change can be applied as is
+            self._balances[user_id] = balance
+            return
+
+        others = [other for uid, other in self._balances.items() if uid != user_id]
+        if others and balance < min(others):
+            # Below the window: someone we don't track may rank above them, so let them go
+            self._balances.pop(user_id, None)
+            return
+
+        self._balances[user_id] = balance
+        if len(self._balances) > self.capacity:
+            # The newcomer pushes the lowest tracked user out of the window
+            del self._balances[min(self._balances, key=self._balances.get)]
+            self._complete = False
+
+    def top(self, n: int | None = None) -> list[tuple[str, int]]:
+        """Returns [(user_id, balance), ...] for the n richest users, richest first."""
+        return heapq.nlargest(n or self.size, self._balances.items(), key=lambda item: item[1])
+
+    def rank_of(self, user_id: str) -> int | None:
+        """Returns the user's 1-based rank if it can be answered from memory, otherwise None."""
+        balance = self._balances.get(user_id)
+        if balance is None:
+            return None
+        return 1 + sum(1 for other in self._balances.values() if other > balance)
+
+    async def get_rank(self, db, user_id: str) -> tuple[int | None, int]:
+        """Returns (rank, balance) for any user, only querying Mongo when they're outside the window."""
+        rank = self.rank_of(user_id)
+        if rank is not None:
+            return rank, self._balances[user_id]
+
+        user_data = await db.get_user(user_id)
+        if not user_data or "balance" not in user_data:
+            return None, 0
+        balance = user_data["balance"]
+        if self._complete:
+            return 1 + sum(1 for other in self._balances.values() if other > balance), balance
+        return 1 + await db.count_users({"balance": {"$gt": balance}}), balance
+
+    async def reconcile(self, db):
+        """Reloads the window from Mongo, keeping any updates that happened meanwhile."""
+        self._reconciling = {}
+        try:
+            docs = await db.find_users(
+                {"balance": {"$exists": True}},
+                sort=[("balance", -1)],
+                limit=self.capacity,
+                projection={"balance": 1}
+            )
+            updates = self._reconciling
+        finally:
+            self._reconciling = None
+
+        self._balances = {doc["_id"]: doc["balance"] for doc in docs}
+        self._complete = len(docs) < self.capacity
+        for user_id, balance in updates.items():
+            self.update(user_id, balance)
+        self.loaded = True
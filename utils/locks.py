@@ -0,0 +1,58 @@
+import asyncio
+import functools
+import weakref
+from discord.ext import commands
+
+BUSY_MESSAGE = "⏳ You're already in the middle of another game or command! Wait for it to finish."
+
+
+class UserLocks:
+    """One asyncio.Lock per user, for commands that touch their balance or items.
+
+    Locks are held weakly: a user's lock only exists while a command holds it
+    (or is about to), so idle users cost nothing.
+    """
+
+    def __init__(self):
+        self._locks = weakref.WeakValueDictionary()
+
+    def get(self, user_id) -> asyncio.Lock:
+        lock = self._locks.get(user_id)
+        if lock is None:
+            lock = self._locks[user_id] = asyncio.Lock()
+        return lock
+
+    def busy(self, user_id) -> bool:
+        lock = self._locks.get(user_id)
+        return lock is not None and lock.locked()
+
+    def __len__(self):
+        return len(self._locks)
+
+
+def exclusive(func):
+    """Command decorator: runs the command while holding the user's lock.
+
+    If the user already has an exclusive command running (or a game whose result
+    is still being revealed, see utils/reveals.py), it replies with
+    BUSY_MESSAGE right away instead of waiting (so a doomed bet never reaches
+    the database). Works on slash commands and text commands, and goes directly
+    above the `async def`.
+    """
+    @functools.wraps(func)
+    async def wrapper(self, ctx_or_interaction, *args, **kwargs):
+        is_context = isinstance(ctx_or_interaction, commands.Context)
+        user = ctx_or_interaction.author if is_context else ctx_or_interaction.user
+        lock = self.bot.user_locks.get(user.id)
+        if lock.locked() or self.bot.reveals.is_revealing(str(user.id)):
+            if is_context:
+                await ctx_or_interaction.send(BUSY_MESSAGE)
+            elif ctx_or_interaction.response.is_done():
+                await ctx_or_interaction.followup.send(BUSY_MESSAGE, ephemeral=True)
+            else:
+                await ctx_or_interaction.response.send_message(BUSY_MESSAGE, ephemeral=True)
+            return
+        # Not locked, so this acquires without yielding: no other command can slip in between
+        async with lock:
+            return await func(self, ctx_or_interaction, *args, **kwargs)
+    return wrapper
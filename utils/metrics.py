@@ -0,0 +1,276 @@
+import asyncio
+import time
+from array import array
+from contextlib import contextmanager
+import aiohttp
+from pymongo import monitoring
+from discord import app_commands
+from discord.webhook.async_ import async_context
+from config import METRICS_LOOP_LAG_INTERVAL
+
+SUB_BUCKET_BITS = 7 # 128 sub-buckets per power of two, so values are kept to within ~1.6%
+MAX_EXPONENT = 36 # Up to 2^36 µs (~19 hours), anything longer is clamped
+MAX_HTTP_HOSTS = 20 # Distinct `http.<domain>` histograms, later domains are counted as `http.other`
+
+
+class LatencyHistogram:
+    """Fixed-memory latency histogram with HDR-style log-linear buckets.
+
+    Values are recorded in microseconds. Each power of two is split into
+    2^(SUB_BUCKET_BITS - 1) equal buckets, so percentiles keep the same relative
+    precision from microseconds to hours in ~2k counters, and `record()` is a
+    couple of integer ops no matter how many samples have been seen.
+    """
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+    HALF = SUB_BUCKETS >> 1
+    SIZE = SUB_BUCKETS + (MAX_EXPONENT - SUB_BUCKET_BITS) * HALF
+    HIGHEST = (1 << MAX_EXPONENT) - 1
+
+    def __init__(self):
+        self.counts = array("Q", bytes(8 * self.SIZE))
+        self.count = 0
+        self.total = 0 # µs
+        self.max = 0 # µs
+
+    @classmethod
+    def _index(cls, micros: int) -> int:
+        if micros < cls.SUB_BUCKETS:
+            return micros
+        shift = micros.bit_length() - SUB_BUCKET_BITS
+        return cls.SUB_BUCKETS + (shift - 1) * cls.HALF + (micros >> shift) - cls.HALF
+
+    @classmethod
+    def _value(cls, index: int) -> int:
+        # Highest value that lands in bucket `index`, so percentiles never under-report
+        if index < cls.SUB_BUCKETS:
+            return index
+        shift, offset = divmod(index - cls.SUB_BUCKETS, cls.HALF)
+        shift += 1
+        return ((offset + cls.HALF + 1) << shift) - 1
+
+    def record(self, seconds: float):
+        micros = min(max(int(seconds * 1_000_000), 0), self.HIGHEST)
+        self.counts[self._index(micros)] += 1
+        self.count += 1
+        self.total += micros
+        if micros > self.max:
+            self.max = micros
+
+    def percentile(self, p: float) -> float:
+        """Returns the `p`th percentile (0-100) in seconds."""
+        if not self.count:
+            return 0.0
+        target = max(1, round(self.count * p / 100))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return min(self._value(index), self.max) / 1_000_000
+        return self.max / 1_000_000
+
+    def snapshot(self) -> dict:
+        """Returns {count, mean, p50, p90, p99, max}, in seconds."""
+        return {
+            "count": self.count,
+            "mean": self.total / self.count / 1_000_000 if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "max": self.max / 1_000_000,
+        }
+
+
+class Metrics:
+    """Named latency histograms and gauges for the whole bot.
+
+    Operations are named `<layer>.<what>`: `command.work` and `app.coinflip` for
+    text and slash commands, `db.findAndModify` for Mongo commands,
+    `http.tikwm.com` for outbound HTTP (per domain, so every CDN node shares one),
+    `discord.POST /channels/{channel_id}/messages` for Discord API calls, including
+    interaction responses and followups, and `loop.lag` for how late the event loop
+    wakes up.
+    Used as the METRICS singleton, read by /metrics and the keep-alive server.
+    """
+
+    def __init__(self):
+        self.histograms = {} # name -> LatencyHistogram
+        self.gauges = {} # name -> callable returning a number
+        self._http_domains = set()
+        self._lag_task = None
+
+    def record(self, name: str, seconds: float):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = LatencyHistogram()
+        histogram.record(seconds)
+
+    @contextmanager
+    def timer(self, name: str):
+        """Records how long the `with` block took (awaits included) under `name`."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def gauge(self, name: str, read):
+        """Registers `read()` to be reported as the current value of `name`."""
+        self.gauges[name] = read
+
+    def report(self, prefix: str = "") -> list[tuple[str, dict]]:
+        """Returns [(name, snapshot)] for every histogram starting with `prefix`, slowest p99 first."""
+        rows = [(name, histogram.snapshot()) for name, histogram in list(self.histograms.items()) if name.startswith(prefix)]
+        return sorted(rows, key=lambda row: row[1]["p99"], reverse=True)
+
+    def read_gauges(self) -> dict:
+        values = {}
+        for name, read in list(self.gauges.items()):
+            try:
+                values[name] = read()
+            except Exception:
+                continue # A gauge whose service isn't up yet
+        return values
+
+    def prometheus(self) -> str:
+        """Renders everything in the Prometheus text format (quantiles in seconds)."""
+        lines = ["# TYPE bot_latency_seconds summary"]
+        for name, stats in self.report():
+            label = name.replace("\\", "\\\\").replace('"', '\\"')
+            for quantile, key in (("0.5", "p50"), ("0.9", "p90"), ("0.99", "p99")):
+                lines.append(f'bot_latency_seconds{{op="{label}",quantile="{quantile}"}} {stats[key]:.6f}')
+            lines.append(f'bot_latency_seconds_sum{{op="{label}"}} {stats["mean"] * stats["count"]:.6f}')
+            lines.append(f'bot_latency_seconds_count{{op="{label}"}} {stats["count"]}')
+        for name, value in self.read_gauges().items():
+            metric = "bot_" + "".join(char if char.isalnum() else "_" for char in name)
+            lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+    # --- Hooks ---
+
+    def install(self, bot):
+        """Times every text command, slash command and Discord API call the bot makes.
+
+        Slash commands are stamped by MeteredTree (pass it as `tree_cls`). Interaction
+        responses and followups don't go through `bot.http` but through discord.py's
+        shared webhook adapter, so its requests are timed too.
+        """
+        bot.before_invoke(self._before_command)
+        bot.after_invoke(self._after_command)
+        bot.add_listener(self._on_app_command_completion, "on_app_command_completion")
+        bot.http.request = self._timed_discord_request(bot.http.request)
+        adapter = async_context.get()
+        adapter.request = self._timed_discord_request(adapter.request)
+
+    async def _before_command(self, ctx):
+        ctx.metrics_started = time.perf_counter()
+
+    async def _after_command(self, ctx):
+        # Runs whether or not the command raised
+        started = getattr(ctx, "metrics_started", None)
+        if started is not None:
+            suffix = ".failed" if ctx.command_failed else ""
+            self.record(f"command.{ctx.command.qualified_name}{suffix}", time.perf_counter() - started)
+
+    async def _on_app_command_completion(self, interaction, command):
+        self.record_interaction(interaction, command)
+
+    def record_interaction(self, interaction, command, failed: bool = False):
+        started = interaction.extras.get("metrics_started")
+        if started is not None and command is not None:
+            suffix = ".failed" if failed else ""
+            self.record(f"app.{command.qualified_name}{suffix}", time.perf_counter() - started)
+
+    def _timed_discord_request(self, request):
+        async def timed_request(route, *args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await request(route, *args, **kwargs)
+            finally:
+                # The route's path is the template (e.g. /channels/{channel_id}/messages), so names stay bounded
+                self.record(f"discord.{route.method} {route.path}", time.perf_counter() - started)
+        return timed_request
+
+    def http_trace_config(self) -> aiohttp.TraceConfig:
+        """An aiohttp TraceConfig recording every request's latency per host (until the headers arrive)."""
+        async def on_request_start(session, context, params):
+            context.started = time.perf_counter()
+
+        async def on_request_end(session, context, params):
+            self.record(f"http.{self._http_domain(params.url.host)}", time.perf_counter() - context.started)
+
+        async def on_request_exception(session, context, params):
+            self.record(f"http.{self._http_domain(params.url.host)}.failed", time.perf_counter() - context.started)
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_request_end.append(on_request_end)
+        trace_config.on_request_exception.append(on_request_exception)
+        return trace_config
+
+    def _http_domain(self, host: str | None) -> str:
+        # CDNs use a different host per node (v16-webapp.tiktok.com, v77.tiktokcdn.com...),
+        # so group by domain, and cap how many domains get their own histogram
+        domain = ".".join((host or "").split(".")[-2:]) or "unknown"
+        if domain not in self._http_domains:
+            if len(self._http_domains) >= MAX_HTTP_HOSTS:
+                return "other"
+            self._http_domains.add(domain)
+        return domain
+
+    def mongo_listener(self) -> monitoring.CommandListener:
+        """A pymongo command listener recording each command's server round-trip."""
+        return MongoCommandTimer(self)
+
+    # --- Event loop lag ---
+
+    def start(self, interval: float = METRICS_LOOP_LAG_INTERVAL):
+        """Starts sampling how late the event loop runs a `sleep(interval)` (a stalled cog shows up here)."""
+        if self._lag_task is None:
+            self._lag_task = asyncio.create_task(self._lag_loop(interval))
+
+    async def _lag_loop(self, interval: float):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(interval)
+            self.record("loop.lag", max(0.0, loop.time() - started - interval))
+
+    def close(self):
+        if self._lag_task:
+            self._lag_task.cancel()
+            self._lag_task = None
+
+
+class MongoCommandTimer(monitoring.CommandListener):
+    """Feeds pymongo's per-command durations (find, findAndModify, insert, ...) into Metrics."""
+
+    def __init__(self, metrics: Metrics):
+        self.metrics = metrics
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self.metrics.record(f"db.{event.command_name}", event.duration_micros / 1_000_000)
+
+    def failed(self, event):
+        self.metrics.record(f"db.{event.command_name}.failed", event.duration_micros / 1_000_000)
+
+
+class MeteredTree(app_commands.CommandTree):
+    """CommandTree that stamps each slash command interaction so its latency can be recorded."""
+
+    async def interaction_check(self, interaction) -> bool:
+        interaction.extras["metrics_started"] = time.perf_counter()
+        return True
+
+    async def on_error(self, interaction, error):
+        METRICS.record_interaction(interaction, interaction.command, failed=True)
+        await super().on_error(interaction, error)
+
+
+METRICS = Metrics()
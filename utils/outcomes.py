@@ -0,0 +1,139 @@
+"""Odds and payouts for the gambling games and /rob, kept free of Discord and Mongo.
+
+The cogs use the scalar functions (one round at a time, with `random`). The
+`batch_*` functions evaluate many rounds at once with NumPy for simulations
+(see simulate_games.py). They all return each round's net result for the
+player, in ₱. NumPy is optional: only the batch functions need it.
+"""
+import random
+
+try:
+    import numpy as np
+except ImportError: # The bot itself doesn't need NumPy, only simulations do
+    np = None
+
+COIN_SIDES = ("head", "tail")
+SPIDERS = ("right", "left")
+COLORS = ("green", "yellow", "pink")
+COLOR_DICE = 3 # Dice rolled per Color Game round
+
+# /rob amounts
+MAX_ROB_AMOUNT = 200
+MIN_ROB_AMOUNT = 1
+
+# Scaling tiers for robbed amount based on target's balance
+ROB_TIERS = {
+    "very_low": {"max_balance": 50, "rob_min": 1, "rob_max": 20},
+    "low": {"max_balance": 200, "rob_min": 1, "rob_max": 50},
+    "medium": {"max_balance": 500, "rob_min": 1, "rob_max": 100},
+    "high": {"max_balance": float('inf'), "rob_min": 1, "rob_max": MAX_ROB_AMOUNT} # float('inf') for effectively no upper limit
+}
+
+
+# --- Single rounds (used by the cogs) ---
+
+def flip_coin(rng=random) -> str:
+    return rng.choice(COIN_SIDES)
+
+
+def even_money_payout(won: bool, bet: int) -> int:
+    """Coinflip, Cockfight and Spider Derby pay the stake plus an equal amount on a win."""
+    return bet * 2 if won else 0
+
+
+def cockfight_wins(rng=random) -> bool:
+    return rng.random() < 0.5 # 50/50 chance for now
+
+
+def spider_winner(rng=random) -> str:
+    return rng.choice(SPIDERS)
+
+
+def roll_colors(rng=random) -> list[str]:
+    return rng.choices(COLORS, k=COLOR_DICE)
+
+
+def color_matches(chosen_colors, rolled_colors) -> dict[str, int]:
+    """How many dice landed on each chosen color."""
+    return {color: rolled_colors.count(color) for color in chosen_colors}
+
+
+def color_winnings(matches: dict[str, int], bet: int) -> int:
+    """Each chosen color wins its bet once per matching die (1x, 2x or 3x). Stakes aren't returned."""
+    return bet * sum(matches.values())
+
+
+def rob_range(target_balance: int) -> tuple[int, int]:
+    """The (min, max) that can be robbed from a target with this balance, before capping at the balance."""
+    rob_min_tier = MIN_ROB_AMOUNT
+    rob_max_tier = MAX_ROB_AMOUNT
+    for tier_info in ROB_TIERS.values():
+        if target_balance <= tier_info["max_balance"]:
+            rob_min_tier = tier_info["rob_min"]
+            rob_max_tier = tier_info["rob_max"]
+            break # Found the appropriate tier
+
+    # Ensure calculated range is valid
+    rob_min_tier = max(MIN_ROB_AMOUNT, rob_min_tier)
+    rob_max_tier = min(MAX_ROB_AMOUNT, rob_max_tier)
+    # Make sure rob_min_tier isn't greater than rob_max_tier
+    return min(rob_min_tier, rob_max_tier), rob_max_tier
+
+
+def rob_amount(target_balance: int, rng=random) -> int:
+    """Randomly chosen amount to rob within the target's tier, capped at their balance (0 if broke)."""
+    if target_balance <= 0:
+        return 0
+    low, high = rob_range(target_balance)
+    return min(rng.randint(low, high), target_balance)
+
+
+# --- Batches (for simulations, NumPy required) ---
+
+def _generator(rng):
+    if np is None:
+        raise RuntimeError("The batch outcome functions need NumPy (pip install numpy)")
+    return rng if rng is not None else np.random.default_rng()
+
+
+def batch_coinflip(rounds: int, bet: int = 1, rng=None):
+    """Net result of `rounds` coin flips (the player's pick doesn't change the odds)."""
+    rng = _generator(rng)
+    won = rng.integers(0, len(COIN_SIDES), size=rounds) == 0
+    return np.where(won, bet, -bet)
+
+
+def batch_cockfight(rounds: int, bet: int = 1, chicken_value: int = 0, rng=None):
+    """Net result of `rounds` cockfights. A loss also costs the chicken, valued at `chicken_value`."""
+    rng = _generator(rng)
+    won = rng.random(rounds) < 0.5
+    return np.where(won, bet, -bet - chicken_value)
+
+
+def batch_spiderderby(rounds: int, bet: int = 1, rng=None):
+    rng = _generator(rng)
+    won = rng.integers(0, len(SPIDERS), size=rounds) == 0
+    return np.where(won, bet, -bet)
+
+
+def batch_colorgame(rounds: int, bet: int = 1, colors_chosen: int = 1, rng=None):
+    """Net result of `rounds` Color Game rounds betting `bet` on each of `colors_chosen` distinct colors."""
+    rng = _generator(rng)
+    # Chosen colors are 0..colors_chosen-1 (the dice are fair, so which ones doesn't matter)
+    dice = rng.integers(0, len(COLORS), size=(rounds, COLOR_DICE))
+    matches = (dice < colors_chosen).sum(axis=1)
+    return bet * matches - bet * colors_chosen
+
+
+def batch_rob(target_balances, rng=None):
+    """Amount robbed from each target balance (the robber's gain, the target's loss)."""
+    rng = _generator(rng)
+    balances = np.asarray(target_balances)
+    tiers = list(ROB_TIERS.values())
+    limits = np.array([tier["max_balance"] for tier in tiers])
+    tier_index = np.searchsorted(limits, balances, side="left")
+    lows = np.array([max(MIN_ROB_AMOUNT, tier["rob_min"]) for tier in tiers])[tier_index]
+    highs = np.array([min(MAX_ROB_AMOUNT, tier["rob_max"]) for tier in tiers])[tier_index]
+    lows = np.minimum(lows, highs)
+    amounts = rng.integers(lows, highs + 1)
+    return np.where(balances > 0, np.minimum(amounts, balances), 0)
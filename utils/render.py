@@ -0,0 +1,69 @@
+from string import Formatter
+
+
+class RenderCache:
+    """Static responses (e.g. the /shop embed) built once and reused.
+
+    Entries are keyed by name and locale and remember the catalog version they
+    were built from, so bumping the version (or calling `invalidate`) makes the
+    next `get` rebuild them. Cached objects are shared, so callers must not
+    mutate them.
+    """
+
+    def __init__(self):
+        self._entries = {} # (name, locale) -> (version, value)
+
+    def get(self, name: str, build, locale: str = "en", version=0):
+        """Returns the cached `name` for this locale/version, calling `build(locale)` on a miss."""
+        entry = self._entries.get((name, locale))
+        if entry is not None and entry[0] == version:
+            return entry[1]
+        value = build(locale)
+        self._entries[(name, locale)] = (version, value)
+        return value
+
+    def invalidate(self, name: str | None = None):
+        """Drops every locale of `name`, or everything if no name is given."""
+        if name is None:
+            self._entries.clear()
+        else:
+            for key in [key for key in self._entries if key[0] == name]:
+                del self._entries[key]
+
+
+class Template:
+    """A str.format-style template parsed once, for messages sent over and over.
+
+    Fields given as keyword arguments here (e.g. a fixed emoji) are filled in up
+    front. `render()` then only formats the remaining fields into their slots,
+    with no parsing.
+    """
+
+    __slots__ = ("_parts", "_fields")
+
+    def __init__(self, template: str, **bound):
+        self._parts = [] # Literal text, with empty slots for the fields
+        self._fields = [] # (slot index, field name, format spec)
+        literal = ""
+        for text, field, spec, conversion in Formatter().parse(template):
+            literal += text
+            if field is None:
+                continue
+            if conversion:
+                raise ValueError(f"Template conversions aren't supported: {{{field}!{conversion}}}")
+            if field in bound:
+                literal += format(bound[field], spec)
+                continue
+            if literal:
+                self._parts.append(literal)
+                literal = ""
+            self._fields.append((len(self._parts), field, spec))
+            self._parts.append("")
+        if literal:
+            self._parts.append(literal)
+
+    def render(self, **values) -> str:
+        parts = self._parts.copy()
+        for index, field, spec in self._fields:
+            parts[index] = format(values[field], spec)
+        return "".join(parts)
@@ -0,0 +1,128 @@
+import asyncio
+import heapq
+import inspect
+import itertools
+import time
+from config import REVEAL_MAX_ACTIVE
+
+
+class Reveal:
+    """The scheduled presentation of one game whose outcome is already settled."""
+
+    __slots__ = ("key", "cancelled", "tasks")
+
+    def __init__(self, key):
+        self.key = key
+        self.cancelled = False
+        self.tasks = set() # Steps currently running (e.g. a message being sent)
+
+
+class RevealScheduler:
+    """Runs the suspense part of the game cogs (animation frames, then the result).
+
+    Games settle their outcome in the database first and then hand the
+    presentation over to `schedule()`. Every step of every game sits in one
+    timer heap that a single task works through, instead of one sleeping
+    coroutine per game. Shared by the game cogs as `bot.reveals`.
+
+    Once REVEAL_MAX_ACTIVE games are being revealed, new ones skip their
+    animation and show the result straight away.
+    """
+
+    def __init__(self, max_active: int = REVEAL_MAX_ACTIVE):
+        self.max_active = max_active
+        self._heap = [] # (due monotonic time, seq, reveal, step, is_final)
+        self._seq = itertools.count() # Tie-breaker so reveals are never compared
+        self._active = {} # key -> Reveal
+        self._wake = asyncio.Event()
+        self._runner = None
+
+    @property
+    def active(self) -> int:
+        """How many games are currently being revealed."""
+        return len(self._active)
+
+    @property
+    def overloaded(self) -> bool:
+        return len(self._active) >= self.max_active
+
+    def is_revealing(self, key) -> bool:
+        return key in self._active
+
+    def schedule(self, key, delay: float, final, frames=()) -> Reveal:
+        """Runs `final()` after `delay` seconds, and each `(at, step)` in `frames` at its time.
+
+        Steps may return an awaitable (e.g. a message send), which runs as its
+        own task. `key` (usually the user id) identifies the reveal until the
+        final step has finished.
+        """
+        reveal = Reveal(key)
+        now = time.monotonic()
+        if self.overloaded:
+            # Shed load: no animation, result right away
+            frames, delay = (), 0
+        self._active[key] = reveal
+        for at, step in frames:
+            heapq.heappush(self._heap, (now + at, next(self._seq), reveal, step, False))
+        heapq.heappush(self._heap, (now + delay, next(self._seq), reveal, final, True))
+        self._wake.set()
+        if self._runner is None or self._runner.done():
+            self._runner = asyncio.create_task(self._run())
+        return reveal
+
+    def cancel(self, key):
+        """Stops a reveal: its remaining steps are skipped and running ones cancelled."""
+        reveal = self._active.pop(key, None)
+        if reveal:
+            reveal.cancelled = True
+            for task in reveal.tasks:
+                task.cancel()
+
+    async def _run(self):
+        while True:
+            self._wake.clear()
+            if not self._heap:
+                await self._wake.wait()
+                continue
+            wait = self._heap[0][0] - time.monotonic()
+            if wait > 0:
+                try:
+                    # Woken early if a sooner step gets scheduled
+                    await asyncio.wait_for(self._wake.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            _, _, reveal, step, is_final = heapq.heappop(self._heap)
+            if not reveal.cancelled:
+                self._start(reveal, step, is_final)
+
+    def _start(self, reveal: Reveal, step, is_final: bool):
+        try:
+            result = step()
+        except Exception as e:
+            print(f"Error in game reveal: {e}")
+            result = None
+        if inspect.isawaitable(result):
+            task = asyncio.ensure_future(self._guard(result))
+            reveal.tasks.add(task)
+            task.add_done_callback(reveal.tasks.discard)
+            if is_final:
+                task.add_done_callback(lambda _: self._finish(reveal))
+        elif is_final:
+            self._finish(reveal)
+
+    async def _guard(self, awaitable):
+        try:
+            await awaitable
+        except Exception as e:
+            print(f"Error in game reveal: {e}")
+
+    def _finish(self, reveal: Reveal):
+        if self._active.get(reveal.key) is reveal:
+            del self._active[reveal.key]
+
+    def close(self):
+        if self._runner:
+            self._runner.cancel()
+        for reveal in list(self._active.values()):
+            self.cancel(reveal.key)
@@ -0,0 +1,111 @@
+import asyncio
+import heapq
+from datetime import datetime
+from config import SHIELD_SWEEP_INTERVAL
+
+FIELD = "anti_rob_expires_at"
+
+
+class ShieldRegistry:
+    """Active Anti-Rob Shields, kept in memory so `/rob` can check them in O(1).
+
+    Seeded at startup from the anti_rob_expires_at index, then kept current as a
+    UserRepository listener (any write that returns a user document updates it).
+    A min-heap of expiries lets a background sweep find lapsed shields without
+    scanning, and clear them from Mongo in one bulk update.
+    """
+
+    def __init__(self, db, sweep_interval: float = SHIELD_SWEEP_INTERVAL):
+        self.db = db
+        self.sweep_interval = sweep_interval
+        self._expiries = {} # user_id -> expiry (naive UTC datetime), active or not yet swept
+        self._heap = [] # (expiry, user_id), may hold stale entries
+        self._task = None
+        self.loaded = False # True once the active shields have been loaded from Mongo
+        self._seeding = None # Users updated while the initial load is running
+
+    def on_user_update(self, doc: dict | None):
+        """UserRepository listener: tracks the shield on every updated document."""
+        if not doc:
+            return
+        if self._seeding is not None:
+            self._seeding.add(doc["_id"]) # Newer than what the load will return
+        expiry = doc.get(FIELD)
+        if expiry is None:
+            self._expiries.pop(doc["_id"], None)
+        elif self._expiries.get(doc["_id"]) != expiry:
+            self._track(doc["_id"], expiry)
+
+    def _track(self, user_id: str, expiry: datetime):
+        self._expiries[user_id] = expiry
+        heapq.heappush(self._heap, (expiry, user_id))
+
+    def protected_until(self, user_id, now: datetime | None = None, doc: dict | None = None) -> datetime | None:
+        """Returns when the user's shield ends, or None if they aren't protected.
+
+        Until the initial load has succeeded, the user's document (`doc`, if the
+        caller has it) is checked as well.
+        """
+        expiry = self._expiries.get(str(user_id))
+        if expiry is None and not self.loaded and doc:
+            expiry = doc.get(FIELD)
+        if expiry is not None and expiry > (now or datetime.utcnow()):
+            return expiry
+        return None
+
+    def is_protected(self, user_id) -> bool:
+        return self.protected_until(user_id) is not None
+
+    async def start(self):
+        """Starts tracking shield updates and the sweep loop, which first loads every
+        active shield (retrying until Mongo answers) and clears already-lapsed ones."""
+        self.db.add_listener(self.on_user_update)
+        if self._task is None:
+            self._task = asyncio.create_task(self._sweep_loop())
+
+    async def load(self):
+        now = datetime.utcnow()
+        self._seeding = set()
+        try:
+            docs = await self.db.find_users({FIELD: {"$gt": now}}, projection={FIELD: 1})
+            for doc in docs:
+                if doc["_id"] not in self._seeding:
+                    self._track(doc["_id"], doc[FIELD])
+        finally:
+            self._seeding = None
+        self.loaded = True
+        print(f"Tracking {len(docs)} active Anti-Rob Shield(s).")
+        await self.db.update_many({FIELD: {"$lte": now}}, {"$unset": {FIELD: ""}})
+
+    async def sweep(self):
+        """Clears every shield that has lapsed since the last sweep, in one update."""
+        now = datetime.utcnow()
+        expired = []
+        while self._heap and self._heap[0][0] <= now:
+            expiry, user_id = heapq.heappop(self._heap)
+            if self._expiries.get(user_id) == expiry: # Skip entries replaced by a newer shield
+                del self._expiries[user_id]
+                expired.append(user_id)
+        if expired:
+            # Conditional, so a shield re-activated in the meantime isn't wiped
+            await self.db.update_many({FIELD: {"$lte": now}}, {"$unset": {FIELD: ""}}, user_ids=expired)
+
+    async def _sweep_loop(self):
+        while not self.loaded:
+            try:
+                await self.load()
+            except Exception as e:
+                print(f"Error loading Anti-Rob Shields, retrying: {e}")
+                await asyncio.sleep(min(self.sweep_interval, 10))
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            try:
+                await self.sweep()
+            except Exception as e:
+                print(f"Error sweeping Anti-Rob Shields: {e}")
+
+    def close(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        self.db.remove_listener(self.on_user_update)
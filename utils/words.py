@@ -0,0 +1,71 @@
+import asyncio
+import os
+import random
+from collections import deque
+
+import aiohttp
+
+DEFAULT_WORD_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "hangman_words.txt")
+
+
+class WordBank:
+    """Bundled word list loaded once, indexed by word length for O(1) sampling.
+
+    Words are stored sorted by length in one list, with the [start, end) slice
+    of each length recorded, so picking a random word in a length range is just
+    a random index. If a remote API is configured, a small in-memory buffer of
+    remote words is topped up in the background; `next_word()` never waits on it.
+    """
+
+    def __init__(self, path: str = DEFAULT_WORD_FILE):
+        with open(path, encoding="utf-8") as f:
+            words = {line.strip().lower() for line in f}
+        self._words = sorted((w for w in words if w.isalpha()), key=lambda w: (len(w), w))
+
+        self._ranges = {} # length -> (start, end) into self._words
+        for index, word in enumerate(self._words):
+            start, _ = self._ranges.get(len(word), (index, index))
+            self._ranges[len(word)] = (start, index + 1)
+
+        self._prefetched = deque()
+        self._refill_task = None
+
+    def __len__(self):
+        return len(self._words)
+
+    def sample(self, min_length: int = 5, max_length: int = 9) -> str:
+        """Returns a random bundled word with min_length <= len(word) <= max_length."""
+        lengths = [n for n in self._ranges if min_length <= n <= max_length]
+        if not lengths:
+            return random.choice(self._words)
+        start = self._ranges[min(lengths)][0]
+        end = self._ranges[max(lengths)][1]
+        return self._words[random.randrange(start, end)]
+
+    def next_word(self, min_length: int = 5, max_length: int = 9) -> str:
+        """Returns a prefetched remote word if one is ready, otherwise a bundled one."""
+        while self._prefetched:
+            word = self._prefetched.popleft()
+            if min_length <= len(word) <= max_length:
+                return word
+        return self.sample(min_length, max_length)
+
+    def refill(self, session: aiohttp.ClientSession, url: str, target: int = 20):
+        """Starts a background top-up of the remote word buffer, unless one is already running."""
+        if len(self._prefetched) >= target // 2 or (self._refill_task and not self._refill_task.done()):
+            return
+        self._refill_task = asyncio.create_task(self._refill(session, url, target))
+
+    async def _refill(self, session: aiohttp.ClientSession, url: str, target: int):
+        try:
+            async with session.get(url, params={"number": target}, timeout=aiohttp.ClientTimeout(total=10)) as resp:
+                if resp.status != 200:
+                    return
+                data = await resp.json()
+            for word in data:
+                word = str(word).lower()
+                # Basic validation to ensure the word contains only alphabetic characters
+                if word.isalpha() and len(self._prefetched) < target:
+                    self._prefetched.append(word)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            print(f"Error prefetching words from API: {e}")